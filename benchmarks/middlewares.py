@@ -0,0 +1,68 @@
+"""Бенчмарк SecurityHeadersMiddleware на /health.
+
+Сравнивает прежнюю реализацию на BaseHTTPMiddleware с чистым ASGI
+middleware. Запросы идут через httpx.ASGITransport, без сети и
+без остальных middleware приложения.
+
+    python -m benchmarks.middlewares
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.services.middlewares import SecurityHeadersMiddleware
+
+REQUESTS = 5_000
+CONCURRENCY = 50
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if not request.url.path.startswith("/docs"):
+            response.headers["Content-Security-Policy"] = "default-src 'self'"
+            response.headers["X-XSS-Protection"] = "1; mode=block"
+        return response
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(middleware)
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "ok", "timestamp": datetime.now().isoformat()}
+
+    return app
+
+
+async def measure(name: str, app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        response = await c.get("/health")
+        assert response.headers["x-xss-protection"] == "1; mode=block"
+
+        async def run(count: int) -> None:
+            for _ in range(count):
+                await c.get("/health")
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(run(REQUESTS // CONCURRENCY) for _ in range(CONCURRENCY))
+        )
+        elapsed = time.perf_counter() - started
+    print(f"{name:20s} {REQUESTS / elapsed:8.0f} req/s")
+
+
+async def main() -> None:
+    await measure("BaseHTTPMiddleware", build_app(LegacySecurityHeadersMiddleware))
+    await measure("pure ASGI", build_app(SecurityHeadersMiddleware))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,157 @@
+"""Бенчмарк чтения списка посылок.
+
+Сравнивает прежний путь (ORM-сущности Package + PackageType через join и
+валидация PackageDetailRead) с текущим: lambda_stmt по колонкам и
+PackageDetailRead.model_construct с названием типа из справочника.
+
+Запускается на SQLite в памяти, поэтому нужен aiosqlite (входит в группу
+зависимостей test). Абсолютные значения отличаются от PostgreSQL, но
+накладные расходы на компиляцию запроса и маппинг строк те же.
+
+    poetry install --with test
+    python -m benchmarks.package_reads
+"""
+
+import asyncio
+import datetime
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.compiler import compiles
+
+from src.crud.packages import PackagesCRUD
+from src.models import Package, PackageType
+from src.schemas.package import PackageDetailRead
+from src.services.packages import _to_detail
+
+SESSIONS = 20
+PACKAGES_PER_SESSION = 500
+PAGE_SIZE = 50
+REQUESTS = 2_000
+
+
+@compiles(PgUUID, "sqlite")
+def _uuid_as_text(type_, compiler, **kw) -> str:
+    # Колонка UUID в SQLite получает NUMERIC affinity, и hex вида "1234e567..."
+    # сохраняется как число; CHAR оставляет идентификатор строкой
+    return "CHAR(32)"
+
+
+async def legacy_list(session, session_uid, page, size):
+    base_stmt = (
+        select(Package, PackageType)
+        .join(PackageType, Package.type_id == PackageType.id)
+        .where(Package.user_session_uid == session_uid)
+    )
+    count_stmt = select(func.count()).select_from(base_stmt.subquery())
+    total = (await session.execute(count_stmt)).scalar_one()
+    rows = (
+        await session.execute(
+            base_stmt.order_by(Package.created_at.desc())
+            .offset((page - 1) * size)
+            .limit(size)
+        )
+    ).all()
+    items = [
+        PackageDetailRead(
+            id=p.id,
+            name=p.name,
+            type_id=p.type_id,
+            type_name=t.name,
+            weight=p.weight,
+            value_of_contents_usd=p.value_of_contents_usd,
+            package_delivery_cost_rub=p.package_delivery_cost_rub,
+        )
+        for p, t in rows
+    ]
+    return items, total
+
+
+async def lean_list(session, session_uid, page, size, type_names):
+    rows, total = await PackagesCRUD.list_for_session(
+        session, session_uid, page=page, size=size
+    )
+    return [_to_detail(row, type_names) for row in rows], total
+
+
+async def seed(session_factory) -> list[uuid.UUID]:
+    rnd = random.Random(42)
+    session_uids = [uuid.uuid4() for _ in range(SESSIONS)]
+    start = datetime.datetime(2025, 1, 1)
+    async with session_factory() as session:
+        session.add_all(
+            [
+                PackageType(id=1, name="Одежда"),
+                PackageType(id=2, name="Электроника"),
+                PackageType(id=3, name="Разное"),
+            ]
+        )
+        await session.flush()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "name": f"package-{i}",
+                "type_id": rnd.randint(1, 3),
+                "weight": round(rnd.uniform(0.1, 50), 3),
+                "value_of_contents_usd": Decimal(rnd.randint(1, 500_000)).scaleb(-2),
+                "package_delivery_cost_rub": None,
+                "user_session_uid": session_uid,
+                "created_at": start + datetime.timedelta(seconds=i),
+                "updated_at": start + datetime.timedelta(seconds=i),
+            }
+            for session_uid in session_uids
+            for i in range(PACKAGES_PER_SESSION)
+        ]
+        await PackagesCRUD.create_many(session, rows)
+        await session.commit()
+    return session_uids
+
+
+async def run(name, session_factory, session_uids, call) -> None:
+    rnd = random.Random(7)
+    pages = PACKAGES_PER_SESSION // PAGE_SIZE
+    async with session_factory() as session:
+        started = time.perf_counter()
+        for _ in range(REQUESTS):
+            await call(session, rnd.choice(session_uids), rnd.randint(1, pages))
+        elapsed = time.perf_counter() - started
+    print(
+        f"{name:8s} {elapsed / REQUESTS * 1e6:8.0f} us/request"
+        f" {REQUESTS * PAGE_SIZE / elapsed:10.0f} rows/s"
+    )
+
+
+async def main() -> None:
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            lambda sync_conn: PackageType.metadata.create_all(
+                sync_conn, tables=[PackageType.__table__, Package.__table__]
+            )
+        )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    session_uids = await seed(session_factory)
+    type_names = {1: "Одежда", 2: "Электроника", 3: "Разное"}
+
+    await run(
+        "legacy",
+        session_factory,
+        session_uids,
+        lambda s, uid, page: legacy_list(s, uid, page, PAGE_SIZE),
+    )
+    await run(
+        "lean",
+        session_factory,
+        session_uids,
+        lambda s, uid, page: lean_list(s, uid, page, PAGE_SIZE, type_names),
+    )
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
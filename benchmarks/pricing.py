@@ -0,0 +1,58 @@
+"""Микробенчмарк расчёта стоимости доставки.
+
+Сравнивает прежнюю формулу на Decimal(float) с целочисленным расчётом из
+src.services.pricing: по одной посылке (как в worker) и пакетом.
+
+    python -m benchmarks.pricing
+"""
+
+import random
+import timeit
+from decimal import Decimal
+
+from src.services import pricing
+
+N = 10_000
+REPEAT = 5
+
+
+def legacy_cost(weight: float, value: Decimal, usd_rate: Decimal) -> Decimal:
+    base_cost_usd = Decimal(weight * 0.5) + Decimal(value) * Decimal(0.01)
+    return Decimal(base_cost_usd * usd_rate)
+
+
+def main() -> None:
+    rnd = random.Random(42)
+    weights = [round(rnd.uniform(0.1, 50), 3) for _ in range(N)]
+    values = [Decimal(rnd.randint(1, 500_000)).scaleb(-2) for _ in range(N)]
+    usd_rate = Decimal("81.7524")
+
+    weights_mg = [pricing.to_scaled(w, pricing.WEIGHT_SCALE) for w in weights]
+    values_cents = [pricing.to_scaled(v, pricing.VALUE_SCALE) for v in values]
+    rate_scaled = pricing.to_scaled(usd_rate, pricing.RATE_SCALE)
+
+    cases = {
+        "legacy Decimal(float)": lambda: [
+            legacy_cost(w, v, usd_rate) for w, v in zip(weights, values)
+        ],
+        "pricing.calculate_delivery_cost": lambda: [
+            pricing.calculate_delivery_cost(w, v, usd_rate)
+            for w, v in zip(weights, values)
+        ],
+        "pricing.calculate_delivery_costs": lambda: pricing.calculate_delivery_costs(
+            weights, values, usd_rate
+        ),
+        "pricing kopecks (pre-scaled)": lambda: (
+            pricing.calculate_delivery_costs_kopecks(
+                weights_mg, values_cents, rate_scaled
+            )
+        ),
+    }
+
+    for name, func in cases.items():
+        best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+        print(f"{name:36s} {best / N * 1e9:8.0f} ns/package")
+
+
+if __name__ == "__main__":
+    main()
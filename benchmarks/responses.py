@@ -0,0 +1,133 @@
+"""Бенчмарк сериализации ответов API.
+
+Сравнивает путь FastAPI по умолчанию (валидация по response_model,
+jsonable_encoder и JSONResponse) с ModelJSONResponse и заранее
+сериализованным справочником типов. Перед замером проверяется, что ответы
+совпадают как JSON-документы, и фиксируются известные различия в записи
+float (см. check_float_edge_cases).
+
+    python -m benchmarks.responses
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from src.api.responses import ModelJSONResponse
+from src.schemas.package import PackageDetailRead, PaginatedPackages
+from src.schemas.packagetypes import PackageTypeRead
+
+PAGE_SIZE = 100
+REQUESTS = 2_000
+
+
+def make_page() -> PaginatedPackages:
+    rnd = random.Random(42)
+    items = [
+        PackageDetailRead.model_construct(
+            id=uuid.UUID(int=rnd.getrandbits(128)),
+            name=f"Посылка {i}",
+            type_id=rnd.randint(1, 3),
+            type_name="Электроника",
+            weight=round(rnd.uniform(0.1, 50), 3),
+            value_of_contents_usd=Decimal(rnd.randint(1, 500_000)).scaleb(-2),
+            package_delivery_cost_rub=(
+                Decimal(rnd.randint(1, 10_000_000)).scaleb(-2) if i % 3 else None
+            ),
+        )
+        for i in range(PAGE_SIZE)
+    ]
+    return PaginatedPackages(
+        items=items, total=1234, page=1, size=PAGE_SIZE, next_cursor=None
+    )
+
+
+async def default_render(field, content) -> bytes:
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+
+async def check_float_edge_cases(field, detail: PackageDetailRead) -> None:
+    """Где вывод ModelJSONResponse отличается от FastAPI по умолчанию."""
+    tiny = detail.model_copy(update={"weight": 1e-07})
+    default_body = await default_render(field, tiny)
+    model_body = ModelJSONResponse(tiny).body
+    # Python пишет 1e-07, pydantic-core — 1e-7: байты разные, число одно
+    assert b'"weight":1e-07' in default_body
+    assert b'"weight":1e-7' in model_body
+    assert json.loads(default_body) == json.loads(model_body)
+
+    # inf/nan: FastAPI падает с ValueError (500), pydantic пишет null
+    infinite = detail.model_copy(update={"weight": math.inf})
+    try:
+        await default_render(field, infinite)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("default render accepted inf")
+    assert json.loads(ModelJSONResponse(infinite).body)["weight"] is None
+
+
+async def measure(name: str, render) -> None:
+    started = time.perf_counter()
+    for _ in range(REQUESTS):
+        await render()
+    elapsed = time.perf_counter() - started
+    print(f"{name:40s} {elapsed / REQUESTS * 1e6:8.1f} us/response")
+
+
+async def main() -> None:
+    page = make_page()
+    detail = page.items[1]
+    types = [
+        PackageTypeRead(id=1, name="Одежда"),
+        PackageTypeRead(id=2, name="Электроника", description="Гаджеты"),
+        PackageTypeRead(id=3, name="Разное"),
+    ]
+    types_body = TypeAdapter(list[PackageTypeRead]).dump_json(types)
+
+    page_field = create_model_field("page", PaginatedPackages, mode="serialization")
+    detail_field = create_model_field("detail", PackageDetailRead, mode="serialization")
+    types_field = create_model_field(
+        "types", list[PackageTypeRead], mode="serialization"
+    )
+
+    # На данных бенчмарка совпадают и байты, но в общем случае только JSON
+    assert await default_render(page_field, page) == ModelJSONResponse(page).body
+    assert await default_render(detail_field, detail) == ModelJSONResponse(detail).body
+    assert await default_render(types_field, types) == types_body
+    await check_float_edge_cases(detail_field, detail)
+
+    await measure(
+        f"packages:list default ({PAGE_SIZE} items)",
+        lambda: default_render(page_field, page),
+    )
+    await measure(
+        f"packages:list ModelJSONResponse ({PAGE_SIZE} items)",
+        lambda: asyncio.sleep(0, ModelJSONResponse(page).body),
+    )
+    await measure("packages:get default", lambda: default_render(detail_field, detail))
+    await measure(
+        "packages:get ModelJSONResponse",
+        lambda: asyncio.sleep(0, ModelJSONResponse(detail).body),
+    )
+    await measure(
+        "package_types:list default", lambda: default_render(types_field, types)
+    )
+    await measure(
+        "package_types:list cached body",
+        lambda: asyncio.sleep(0, types_body),
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,21 @@
+from typing import Any
+
+import fastapi
+from pydantic import BaseModel
+
+
+class ModelJSONResponse(fastapi.Response):
+    """JSON-ответ, сериализуемый pydantic-сериализатором модели сразу в байты.
+
+    Обработчик, возвращающий Response, минует повторную валидацию по
+    response_model и jsonable_encoder. Decimal и UUID пишутся строками, JSON
+    без пробелов, как у FastAPI по умолчанию; запись float может отличаться
+    (1e-7 вместо 1e-07), а inf и nan сериализуются как null.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return super().render(content)
@@ -1,17 +1,43 @@
+import re
+
 import fastapi
 
 from src.schemas import packagetypes as packagetypes_schemas
-from src.services.package_types import package_type_service as service
+from src.services.package_types import package_type_catalog
 
 
 router = fastapi.APIRouter(prefix="/package_types", tags=["package_types"])
 
+_ENTITY_TAG = re.compile(r'(?:W/)?"[^"]*"')
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match по RFC 9110: список тегов, слабое сравнение и "*"."""
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.removeprefix("W/") == etag.removeprefix("W/")
+        for tag in _ENTITY_TAG.findall(if_none_match)
+    )
+
 
 @router.get(
     "",
     name="package_types:list",
     response_model=list[packagetypes_schemas.PackageTypeRead],
 )
-async def list_package_types() -> list[packagetypes_schemas.PackageTypeRead]:
-    types = await service.get_all_types()
-    return types
+async def list_package_types(request: fastapi.Request) -> fastapi.Response:
+    snapshot = await package_type_catalog.get()
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={int(package_type_catalog.ttl)}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return fastapi.Response(
+            status_code=fastapi.status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    return fastapi.Response(
+        content=snapshot.body, media_type="application/json", headers=headers
+    )
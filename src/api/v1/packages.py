@@ -1,12 +1,20 @@
+from typing import Literal
 import uuid
 import fastapi
+from fastapi.responses import StreamingResponse
 
+from src.api.responses import ModelJSONResponse
+from src.core.app_settings import app_settings
+from src.core.unit_of_work import UnitOfWork, get_unit_of_work
 from src.schemas import package as package_schemas
+from src.services.admission import get_admission_controller
 from src.services.packages import package_service as service
 
-
 router = fastapi.APIRouter(prefix="/packages", tags=["packages"])
 
+create_admission = get_admission_controller("packages:create")
+create_bulk_admission = get_admission_controller("packages:create_bulk")
+
 
 def _ensure_session_cookie(
     request: fastapi.Request, response: fastapi.Response
@@ -27,6 +35,32 @@ def _ensure_session_cookie(
     return new_sid
 
 
+async def _read_bulk_body(request: fastapi.Request) -> bytes:
+    """Тело запроса не больше BULK_MAX_BODY_BYTES, иначе 413 без дочитывания."""
+    limit = app_settings.BULK_MAX_BODY_BYTES
+    too_large = fastapi.HTTPException(
+        status_code=fastapi.status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds {limit} bytes",
+    )
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise too_large
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise too_large
+    return bytes(body)
+
+
+def _copy_cookies(source: fastapi.Response, target: fastapi.Response) -> None:
+    # Возвращаемый Response не наследует заголовки внедрённого response
+    for key, value in source.raw_headers:
+        if key == b"set-cookie":
+            target.raw_headers.append((key, value))
+
+
 @router.post(
     "",
     name="packages:create",
@@ -37,9 +71,50 @@ async def create_package(
     request: fastapi.Request,
     response: fastapi.Response,
     package_data: package_schemas.PackageCreate,
+    uow: UnitOfWork = fastapi.Depends(get_unit_of_work),
 ) -> package_schemas.PackageCreateResponse:
     session_uid = _ensure_session_cookie(request, response)
-    return await service.register_package(session_uid=session_uid, data=package_data)
+    async with create_admission.slot():
+        return await service.register_package(
+            uow=uow, session_uid=session_uid, data=package_data
+        )
+
+
+@router.post(
+    "/bulk",
+    name="packages:create_bulk",
+    response_model=package_schemas.BulkPackageCreateResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {
+                    "schema": package_schemas.BulkPackageCreate.model_json_schema()
+                },
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def create_packages_bulk(
+    request: fastapi.Request,
+    response: fastapi.Response,
+    uow: UnitOfWork = fastapi.Depends(get_unit_of_work),
+) -> package_schemas.BulkPackageCreateResponse:
+    session_uid = _ensure_session_cookie(request, response)
+    content_type = request.headers.get("content-type", "")
+    # Тело читается до слота: время загрузки клиентом не должно попадать в
+    # задержку, по которой подстраивается лимит
+    body = await _read_bulk_body(request)
+    async with create_bulk_admission.slot():
+        return await service.register_packages_bulk(
+            uow=uow,
+            session_uid=session_uid,
+            body=body,
+            ndjson=content_type.startswith(
+                ("application/x-ndjson", "application/jsonl")
+            ),
+        )
 
 
 @router.get(
@@ -54,15 +129,56 @@ async def list_packages(
     size: int = fastapi.Query(20, ge=1, le=100),
     type_id: int | None = fastapi.Query(None),
     has_delivery_cost: bool | None = fastapi.Query(None),
-) -> package_schemas.PaginatedPackages:
+    cursor: str | None = fastapi.Query(None),
+    include_total: bool | None = fastapi.Query(None),
+    uow: UnitOfWork = fastapi.Depends(get_unit_of_work),
+) -> ModelJSONResponse:
     session_uid = _ensure_session_cookie(request, response)
-    return await service.list_packages(
+    result = await service.list_packages(
+        uow=uow,
         session_uid=session_uid,
         type_id=type_id,
         has_delivery_cost=has_delivery_cost,
         page=page,
         size=size,
+        cursor=cursor,
+        include_total=include_total,
+    )
+    rendered = ModelJSONResponse(result)
+    _copy_cookies(response, rendered)
+    return rendered
+
+
+@router.get(
+    "/export",
+    name="packages:export",
+    response_class=StreamingResponse,
+)
+async def export_packages(
+    request: fastapi.Request,
+    response: fastapi.Response,
+    format: Literal["ndjson", "csv"] = fastapi.Query("ndjson"),
+    type_id: int | None = fastapi.Query(None),
+    has_delivery_cost: bool | None = fastapi.Query(None),
+) -> StreamingResponse:
+    session_uid = _ensure_session_cookie(request, response)
+    media_type = (
+        "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    )
+    streaming = StreamingResponse(
+        service.export_packages(
+            session_uid=session_uid,
+            type_id=type_id,
+            has_delivery_cost=has_delivery_cost,
+            fmt=format,
+        ),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="packages.{format}"',
+        },
     )
+    _copy_cookies(response, streaming)
+    return streaming
 
 
 @router.get(
@@ -74,8 +190,12 @@ async def get_package(
     package_id: uuid.UUID,
     request: fastapi.Request,
     response: fastapi.Response,
-) -> package_schemas.PackageDetailRead:
+    uow: UnitOfWork = fastapi.Depends(get_unit_of_work),
+) -> ModelJSONResponse:
     session_uid = _ensure_session_cookie(request, response)
-    return await service.get_package_by_id(
-        session_uid=session_uid, package_id=package_id
+    result = await service.get_package_by_id(
+        uow=uow, session_uid=session_uid, package_id=package_id
     )
+    rendered = ModelJSONResponse(result)
+    _copy_cookies(response, rendered)
+    return rendered
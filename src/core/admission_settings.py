@@ -0,0 +1,54 @@
+from pathlib import Path
+from typing import Literal
+
+
+from pydantic import BaseModel, Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class AdmissionLimits(BaseModel):
+    # Лимит одновременных запросов подстраивается в [MIN_LIMIT, MAX_LIMIT]
+    INITIAL_LIMIT: int = Field(default=32, ge=1)
+    MIN_LIMIT: int = Field(default=4, ge=1)
+    MAX_LIMIT: int = Field(default=128, ge=1)
+    # Короткая очередь ожидания сверх лимита
+    MAX_QUEUE: int = Field(default=32, ge=0)
+    QUEUE_TIMEOUT_SECONDS: float = Field(default=0.5, ge=0)
+    # Если сглаженная задержка выше цели, лимит уменьшается
+    TARGET_LATENCY_SECONDS: float = Field(default=0.25, gt=0)
+    REJECT_STATUS: Literal[429, 503] = Field(default=503)
+    RETRY_AFTER_SECONDS: int = Field(default=1, ge=1)
+
+
+class AdmissionSettings(BaseSettings):
+    ENABLED: bool = Field(default=True)
+    DEFAULT: AdmissionLimits = Field(default_factory=AdmissionLimits)
+    # Переопределения по имени маршрута, например packages:create_bulk
+    ENDPOINTS: dict[str, AdmissionLimits] = Field(
+        default_factory=lambda: {
+            # Вставка до BULK_MAX_ITEMS строк с коммитом заметно дольше
+            # одиночной, поэтому и цель по задержке своя
+            "packages:create_bulk": AdmissionLimits(
+                INITIAL_LIMIT=4,
+                MIN_LIMIT=1,
+                MAX_LIMIT=16,
+                MAX_QUEUE=8,
+                QUEUE_TIMEOUT_SECONDS=2.0,
+                TARGET_LATENCY_SECONDS=2.0,
+            ),
+        }
+    )
+
+    model_config = SettingsConfigDict(
+        env_file=Path(__file__).parent.parent.parent / ".env",
+        env_file_encoding="utf-8",
+        env_prefix="ADMISSION_",
+        env_nested_delimiter="__",
+        extra="ignore",
+    )
+
+    def get_limits(self, endpoint: str) -> AdmissionLimits:
+        return self.ENDPOINTS.get(endpoint, self.DEFAULT)
+
+
+admission_settings = AdmissionSettings()
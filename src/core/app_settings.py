@@ -37,6 +37,15 @@ class AppSettings(BaseSettings):
     DOCS_URL: str | None = Field(default="/docs")
     REDOC_URL: str | None = Field(default="/redoc")
 
+    # Массовая регистрация посылок
+    BULK_MAX_ITEMS: int = Field(default=1000, ge=1)
+    # Тело больше лимита отклоняется до чтения и разбора
+    BULK_MAX_BODY_BYTES: int = Field(default=2 * 1024 * 1024, ge=1)
+
+    # Настройки outbox
+    OUTBOX_BATCH_SIZE: int = Field(default=100, ge=1)
+    OUTBOX_POLL_INTERVAL_SECONDS: float = Field(default=1.0, gt=0)
+
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env",
         env_file_encoding="utf-8",
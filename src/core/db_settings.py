@@ -1,15 +1,80 @@
+import itertools
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Hashable, Iterator, Literal, Optional
 
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
     AsyncEngine,
     AsyncSession,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.metrics import Gauge, Histogram
+
+PoolProfileName = Literal["api", "worker", "pgbouncer-transaction"]
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pool_pre_ping: bool
+    statement_cache_size: int
+    prepared_statement_cache_size: int
+    # Уникальные имена prepared statements: в transaction-режиме PgBouncer
+    # соседние транзакции попадают на разные серверные соединения
+    unique_statement_names: bool = False
+
+
+POOL_PROFILES: dict[str, PoolProfile] = {
+    # Короткие запросы под всплесками: небольшой запас overflow и быстрый
+    # отказ по таймауту вместо длинной очереди за соединением
+    "api": PoolProfile(
+        pool_size=10,
+        max_overflow=5,
+        pool_timeout=5.0,
+        pool_recycle=1800,
+        pool_pre_ping=False,
+        statement_cache_size=100,
+        prepared_statement_cache_size=100,
+    ),
+    # Долгоживущие соединения, которые могут простаивать между пачками
+    "worker": PoolProfile(
+        pool_size=10,
+        max_overflow=0,
+        pool_timeout=30.0,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        statement_cache_size=100,
+        prepared_statement_cache_size=100,
+    ),
+    # Кэши prepared statements на стороне клиента отключены
+    "pgbouncer-transaction": PoolProfile(
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=10.0,
+        pool_recycle=600,
+        pool_pre_ping=False,
+        statement_cache_size=0,
+        prepared_statement_cache_size=0,
+        unique_statement_names=True,
+    ),
+}
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
 
 
 class DatabaseSettings(BaseSettings):
@@ -19,10 +84,22 @@ class DatabaseSettings(BaseSettings):
     USER: str = Field(min_length=1)
     PASSWORD: str = Field(min_length=1)
 
-    POOL_SIZE: int = Field(default=10, ge=1)
-    MAX_OVERFLOW: int = Field(default=20, ge=0)
+    # Профиль пула; отдельные параметры ниже переопределяют значения профиля
+    PROFILE: Optional[PoolProfileName] = Field(default=None)
+    POOL_SIZE: Optional[int] = Field(default=None, ge=1)
+    MAX_OVERFLOW: Optional[int] = Field(default=None, ge=0)
+    POOL_TIMEOUT: Optional[float] = Field(default=None, gt=0)
+    POOL_RECYCLE: Optional[int] = Field(default=None)
+    POOL_PRE_PING: Optional[bool] = Field(default=None)
+    STATEMENT_CACHE_SIZE: Optional[int] = Field(default=None, ge=0)
+    PREPARED_STATEMENT_CACHE_SIZE: Optional[int] = Field(default=None, ge=0)
     ECHO: bool = Field(default=False)
 
+    # Реплики только для чтения (полные DSN) и окно, в течение которого
+    # чтения сессии после записи идут в primary
+    REPLICA_URLS: list[str] = Field(default=[])
+    READ_YOUR_WRITES_SECONDS: float = Field(default=5.0, ge=0)
+
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env",
         env_file_encoding="utf-8",
@@ -37,22 +114,114 @@ class DatabaseSettings(BaseSettings):
             f"{self.PORT}/{self.DB}"
         )
 
+    def get_profile(self) -> PoolProfile:
+        return POOL_PROFILES[self.PROFILE or "api"]
+
+    def get_engine_options(self) -> dict[str, Any]:
+        profile = self.get_profile()
+
+        def pick(value, default):
+            return default if value is None else value
+
+        connect_args: dict[str, Any] = {
+            "statement_cache_size": pick(
+                self.STATEMENT_CACHE_SIZE, profile.statement_cache_size
+            ),
+            "prepared_statement_cache_size": pick(
+                self.PREPARED_STATEMENT_CACHE_SIZE,
+                profile.prepared_statement_cache_size,
+            ),
+        }
+        if profile.unique_statement_names:
+            connect_args["prepared_statement_name_func"] = _unique_statement_name
+
+        return {
+            "pool_size": pick(self.POOL_SIZE, profile.pool_size),
+            "max_overflow": pick(self.MAX_OVERFLOW, profile.max_overflow),
+            "pool_timeout": pick(self.POOL_TIMEOUT, profile.pool_timeout),
+            "pool_recycle": pick(self.POOL_RECYCLE, profile.pool_recycle),
+            "pool_pre_ping": pick(self.POOL_PRE_PING, profile.pool_pre_ping),
+            "echo": self.ECHO,
+            "connect_args": connect_args,
+        }
+
+
+pool_checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool",
+    labelnames=("pool",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0),
+)
+
+
+class _TimedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который учитывает ожидание соединения любым его пользователем.
+
+    Метка pool берётся из pool_logging_name движка: это имя сохраняется,
+    когда SQLAlchemy пересоздаёт пул (recreate).
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.labels(self._orig_logging_name or "primary").observe(
+                time.perf_counter() - started
+            )
+
+
+@dataclass(frozen=True)
+class PoolMetrics:
+    size: int
+    checked_out: int
+    overflow: int
+
 
 class DatabaseManager:
     def __init__(self, settings: DatabaseSettings):
         self.settings = settings
         self._engine: AsyncEngine | None = None
         self._session_factory: async_sessionmaker[AsyncSession] | None = None
+        self._replica_engines: list[AsyncEngine] = []
+        self._replica_factories: Optional[
+            Iterator[async_sessionmaker[AsyncSession]]
+        ] = None
+        # Ключ сессии -> момент, до которого её чтения идут в primary
+        self._recent_writes: OrderedDict[Hashable, float] = OrderedDict()
+
+    def _create_engine(self, url: str, pool_name: str) -> AsyncEngine:
+        options = self.settings.get_engine_options()
+        if make_url(url).get_driver_name() != "asyncpg":
+            # Параметры кэша выражений понимает только asyncpg
+            options.pop("connect_args")
+        return create_async_engine(
+            url,
+            future=True,
+            poolclass=_TimedQueuePool,
+            pool_logging_name=pool_name,
+            **options,
+        )
+
+    def configure_pool(self, pool_size: int, max_overflow: int) -> None:
+        if self._engine is not None:
+            raise RuntimeError("Pool must be configured before engine is created")
+        self.settings = self.settings.model_copy(
+            update={"POOL_SIZE": pool_size, "MAX_OVERFLOW": max_overflow}
+        )
+
+    def use_default_profile(self, profile: PoolProfileName) -> None:
+        """Задаёт профиль пула, если он не указан явно в POSTGRES_PROFILE."""
+        if self._engine is not None:
+            raise RuntimeError("Pool must be configured before engine is created")
+        if self.settings.PROFILE is None:
+            self.settings = self.settings.model_copy(update={"PROFILE": profile})
 
     @property
     def engine(self) -> AsyncEngine:
         if self._engine is None:
-            self._engine = create_async_engine(
-                self.settings.get_database_url(),
-                pool_size=self.settings.POOL_SIZE,
-                max_overflow=self.settings.MAX_OVERFLOW,
-                echo=self.settings.ECHO,
-                future=True,
+            self._engine = self._create_engine(
+                self.settings.get_database_url(), "primary"
             )
         return self._engine
 
@@ -64,6 +233,64 @@ class DatabaseManager:
             )
         return self._session_factory
 
+    def mark_write(self, key: Hashable) -> None:
+        """Отмечает запись от имени key: его чтения временно идут в primary."""
+        if not self.settings.REPLICA_URLS:
+            return
+        now = time.monotonic()
+        self._recent_writes.pop(key, None)
+        self._recent_writes[key] = now + self.settings.READ_YOUR_WRITES_SECONDS
+        # Окно у всех ключей одинаковое, поэтому истёкшие записи в начале
+        while self._recent_writes:
+            oldest_key, deadline = next(iter(self._recent_writes.items()))
+            if deadline > now:
+                break
+            del self._recent_writes[oldest_key]
+
+    def _wrote_recently(self, key: Optional[Hashable]) -> bool:
+        if key is None:
+            return False
+        deadline = self._recent_writes.get(key)
+        return deadline is not None and deadline > time.monotonic()
+
+    def read_session_factory(
+        self, key: Optional[Hashable] = None
+    ) -> async_sessionmaker[AsyncSession]:
+        """Фабрика сессий для чтения: реплики по кругу или primary.
+
+        Primary используется, если реплики не настроены или key недавно писал
+        (read-your-writes).
+        """
+        if not self.settings.REPLICA_URLS or self._wrote_recently(key):
+            return self.session_factory
+        if self._replica_factories is None:
+            self._replica_engines = [
+                self._create_engine(url, "replica")
+                for url in self.settings.REPLICA_URLS
+            ]
+            self._replica_factories = itertools.cycle(
+                [
+                    async_sessionmaker(
+                        engine, class_=AsyncSession, expire_on_commit=False
+                    )
+                    for engine in self._replica_engines
+                ]
+            )
+        return next(self._replica_factories)
+
+    def pool_metrics(self) -> PoolMetrics:
+        pool = self._engine.pool if self._engine is not None else None
+        return PoolMetrics(
+            size=(
+                pool.size()
+                if pool is not None
+                else self.settings.get_engine_options()["pool_size"]
+            ),
+            checked_out=pool.checkedout() if pool is not None else 0,
+            # overflow() отрицателен, пока пул не заполнен до pool_size
+            overflow=max(pool.overflow(), 0) if pool is not None else 0,
+        )
+
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             try:
@@ -77,11 +304,29 @@ class DatabaseManager:
     async def close(self) -> None:
         if self._engine:
             await self._engine.dispose()
+        for engine in self._replica_engines:
+            await engine.dispose()
 
 
 db_settings = DatabaseSettings()  # type: ignore[call-arg]
 db_manager = DatabaseManager(db_settings)
 
+Gauge(
+    "db_pool_size",
+    "Configured size of the primary pool",
+    callback=lambda: db_manager.pool_metrics().size,
+)
+Gauge(
+    "db_pool_checked_out",
+    "Primary pool connections currently in use",
+    callback=lambda: db_manager.pool_metrics().checked_out,
+)
+Gauge(
+    "db_pool_overflow",
+    "Primary pool connections opened above pool size",
+    callback=lambda: db_manager.pool_metrics().overflow,
+)
+
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with db_manager.session_factory() as session:
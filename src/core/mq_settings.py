@@ -12,6 +12,15 @@ class RabbitMQSettings(BaseSettings):
     PORT: int = Field(default=5672, ge=1, le=65535)
     MANAGEMENT_PORT: int = Field(default=15672, ge=1, le=65535)
 
+    # Настройки публикации: пул каналов с подтверждениями
+    PUBLISH_CHANNELS: int = Field(default=4, ge=1)
+    PUBLISH_MAX_IN_FLIGHT: int = Field(default=1000, ge=1)
+    # Сколько ждать ack брокера; outbox relay ждёт его под блокировками строк
+    PUBLISH_CONFIRM_TIMEOUT_SECONDS: float = Field(default=10.0, gt=0)
+
+    # Задержки повторных попыток (по одной TTL-очереди на каждую ступень)
+    RETRY_DELAYS_MS: list[int] = Field(default=[5000, 10000, 15000], min_length=1)
+
     model_config = SettingsConfigDict(
         env_file=Path(__file__).parent.parent.parent / ".env",
         env_file_encoding="utf-8",
@@ -27,5 +36,12 @@ class RabbitMQSettings(BaseSettings):
             f"{vhost}"
         )
 
+    def get_retry_delay_ms(self, retry_count: int) -> int:
+        return self.RETRY_DELAYS_MS[min(retry_count, len(self.RETRY_DELAYS_MS) - 1)]
+
+    @staticmethod
+    def get_retry_queue_name(delay_ms: int) -> str:
+        return f"package_retry_{delay_ms}ms"
+
 
 mq_settings = RabbitMQSettings()
@@ -0,0 +1,66 @@
+from typing import AsyncGenerator, Hashable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.db_settings import DatabaseManager, db_manager
+
+
+class UnitOfWork:
+    """Сессия БД на время одного запроса.
+
+    Соединение берётся из пула при первом вызове session() или
+    read_session() и возвращается в release() или после commit(), не
+    дожидаясь конца запроса. Незакоммиченные изменения при release()
+    откатываются.
+    """
+
+    def __init__(self, manager: DatabaseManager = db_manager):
+        self._manager = manager
+        self._session: Optional[AsyncSession] = None
+        self._read_session: Optional[AsyncSession] = None
+
+    async def _open(self, factory: async_sessionmaker[AsyncSession]) -> AsyncSession:
+        session = factory()
+        try:
+            await session.connection()
+        except Exception:
+            await session.close()
+            raise
+        return session
+
+    async def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = await self._open(self._manager.session_factory)
+        return self._session
+
+    async def read_session(self, key: Optional[Hashable] = None) -> AsyncSession:
+        """Сессия только для чтения: реплика, если key недавно не писал."""
+        if self._session is not None:
+            return self._session
+        if self._read_session is None:
+            self._read_session = await self._open(
+                self._manager.read_session_factory(key)
+            )
+        return self._read_session
+
+    async def commit(self, written_by: Optional[Hashable] = None) -> None:
+        if self._session is not None:
+            await self._session.commit()
+            if written_by is not None:
+                self._manager.mark_write(written_by)
+            await self.release()
+
+    async def release(self) -> None:
+        for session in (self._session, self._read_session):
+            if session is not None:
+                await session.close()
+        self._session = None
+        self._read_session = None
+
+
+async def get_unit_of_work() -> AsyncGenerator[UnitOfWork, None]:
+    uow = UnitOfWork()
+    try:
+        yield uow
+    finally:
+        await uow.release()
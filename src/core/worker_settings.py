@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import Literal
+
+
+from pydantic import Field, model_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class WorkerSettings(BaseSettings):
+    MODE: Literal["single", "batch", "concurrent"] = Field(default="single")
+    PREFETCH_COUNT: int | None = Field(default=None, ge=1)
+
+    # Настройки пакетной обработки
+    BATCH_SIZE: int = Field(default=100, ge=1, le=1000)
+    BATCH_WINDOW_SECONDS: float = Field(default=0.2, gt=0)
+
+    # Настройки конкурентной обработки
+    CONCURRENCY: int = Field(default=10, ge=1)
+
+    MAX_RETRIES: int = Field(default=3, ge=0)
+
+    # Сколько последних обработанных посылок помнить для отсева повторов
+    DEDUP_CACHE_SIZE: int = Field(default=10000, ge=0)
+
+    # Настройки sweeper: досчёт посылок, оставшихся без стоимости
+    SWEEP_INTERVAL_SECONDS: float = Field(default=300.0, gt=0)
+    SWEEP_MIN_AGE_SECONDS: float = Field(default=7200.0, ge=0)
+    SWEEP_BATCH_SIZE: int = Field(default=1000, ge=1)
+
+    # Порт эндпоинта /metrics; дочерние процессы супервизора занимают
+    # METRICS_PORT + номер процесса
+    METRICS_PORT: int | None = Field(default=9100, ge=1, le=65535)
+
+    # Настройки супервизора процессов
+    PROCESSES: int = Field(default=1, ge=1)
+    DB_CONNECTIONS_BUDGET: int = Field(default=30, ge=1)
+    # Задержка перезапуска упавшего процесса удваивается до RESTART_MAX_DELAY
+    # и сбрасывается, если процесс проработал RESTART_RESET_AFTER_SECONDS
+    RESTART_DELAY_SECONDS: float = Field(default=1.0, ge=0)
+    RESTART_MAX_DELAY_SECONDS: float = Field(default=60.0, ge=0)
+    RESTART_RESET_AFTER_SECONDS: float = Field(default=60.0, ge=0)
+    SHUTDOWN_TIMEOUT_SECONDS: float = Field(default=30.0, gt=0)
+
+    model_config = SettingsConfigDict(
+        env_file=Path(__file__).parent.parent.parent / ".env",
+        env_file_encoding="utf-8",
+        env_prefix="WORKER_",
+        extra="ignore",
+    )
+
+    @model_validator(mode="after")
+    def check_connections_budget(self) -> "WorkerSettings":
+        # Каждому процессу нужно хотя бы одно соединение
+        if self.PROCESSES > self.DB_CONNECTIONS_BUDGET:
+            raise ValueError(
+                f"PROCESSES ({self.PROCESSES}) exceeds "
+                f"DB_CONNECTIONS_BUDGET ({self.DB_CONNECTIONS_BUDGET})"
+            )
+        return self
+
+    def get_prefetch_count(self) -> int:
+        if self.PREFETCH_COUNT is not None:
+            return self.PREFETCH_COUNT
+        if self.MODE == "batch":
+            return self.BATCH_SIZE
+        if self.MODE == "concurrent":
+            return self.CONCURRENCY
+        return 1
+
+    def get_pool_size_per_process(self) -> int:
+        # Бюджет делится поровну, чтобы сумма пулов не превысила max_connections
+        return self.DB_CONNECTIONS_BUDGET // self.PROCESSES
+
+
+worker_settings = WorkerSettings()
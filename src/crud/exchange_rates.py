@@ -0,0 +1,62 @@
+import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.exchange_rate import ExchangeRate, ExchangeRateLease
+
+
+class ExchangeRatesCRUD:
+    @staticmethod
+    async def get(session: AsyncSession, currency_code: str) -> Optional[ExchangeRate]:
+        stmt = select(ExchangeRate).where(ExchangeRate.currency_code == currency_code)
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def try_acquire_lease(
+        session: AsyncSession, currency_code: str, lease_seconds: float
+    ) -> bool:
+        """Берёт аренду обновления курса, если её нет или она истекла."""
+        stmt = insert(ExchangeRateLease).values(
+            currency_code=currency_code,
+            lease_until=func.now() + datetime.timedelta(seconds=lease_seconds),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRateLease.currency_code],
+            set_={"lease_until": stmt.excluded.lease_until, "updated_at": func.now()},
+            where=ExchangeRateLease.lease_until <= func.now(),
+        ).returning(ExchangeRateLease.currency_code)
+        return (await session.execute(stmt)).scalar_one_or_none() is not None
+
+    @staticmethod
+    async def release_lease(session: AsyncSession, currency_code: str) -> None:
+        await session.execute(
+            delete(ExchangeRateLease).where(
+                ExchangeRateLease.currency_code == currency_code
+            )
+        )
+
+    @staticmethod
+    async def upsert(
+        session: AsyncSession,
+        currency_code: str,
+        rate: Decimal,
+        fetched_at: datetime.datetime,
+    ) -> None:
+        stmt = insert(ExchangeRate).values(
+            currency_code=currency_code, rate=rate, fetched_at=fetched_at
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ExchangeRate.currency_code],
+            set_={
+                "rate": stmt.excluded.rate,
+                "fetched_at": stmt.excluded.fetched_at,
+                "updated_at": func.now(),
+            },
+            where=ExchangeRate.fetched_at < stmt.excluded.fetched_at,
+        )
+        await session.execute(stmt)
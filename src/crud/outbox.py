@@ -0,0 +1,50 @@
+from typing import Any, Sequence
+from uuid import UUID
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models.outbox import OutboxMessage
+
+
+class OutboxCRUD:
+    @staticmethod
+    async def add(
+        session: AsyncSession, package_id: UUID, payload: dict[str, Any]
+    ) -> OutboxMessage:
+        try:
+            message = OutboxMessage(package_id=package_id, payload=payload)
+            session.add(message)
+            await session.flush()
+            return message
+        except SQLAlchemyError as e:
+            raise RuntimeError("Database operation failed") from e
+
+    @staticmethod
+    async def add_many(session: AsyncSession, rows: Sequence[dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            await session.execute(insert(OutboxMessage), rows)
+        except SQLAlchemyError as e:
+            raise RuntimeError("Database operation failed") from e
+
+    @staticmethod
+    async def claim_batch(session: AsyncSession, limit: int) -> Sequence[OutboxMessage]:
+        """Блокирует до limit записей; занятые другим relay строки пропускаются."""
+        stmt = (
+            select(OutboxMessage)
+            .order_by(OutboxMessage.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def delete_many(session: AsyncSession, ids: Sequence[int]) -> None:
+        if not ids:
+            return
+        stmt = delete(OutboxMessage).where(OutboxMessage.id.in_(ids))
+        await session.execute(stmt)
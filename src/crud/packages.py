@@ -1,14 +1,40 @@
+from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Optional, Sequence
+from typing import Mapping, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy import Select, and_, func, select
-from sqlalchemy.orm import selectinload
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    DECIMAL,
+    Select,
+    column,
+    exists,
+    Row,
+    StatementLambdaElement,
+    func,
+    insert,
+    lambda_stmt,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import UUID as PgUUID
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from src.models.package import Package
-from src.models.package_types import PackageType
+
+
+def _detail_select() -> Select:
+    return select(
+        Package.id,
+        Package.name,
+        Package.type_id,
+        Package.weight,
+        Package.value_of_contents_usd,
+        Package.package_delivery_cost_rub,
+        Package.created_at,
+    )
 
 
 class PackagesCRUD:
@@ -23,19 +49,43 @@ class PackagesCRUD:
         except SQLAlchemyError as e:
             raise RuntimeError("Database operation failed") from e
 
+    @staticmethod
+    async def create_many(session: AsyncSession, rows: Sequence[dict]) -> None:
+        """Вставляет посылки многострочным INSERT (insertmanyvalues)."""
+        if not rows:
+            return
+        try:
+            await session.execute(insert(Package), rows)
+        except IntegrityError as e:
+            raise ValueError("Invalid package data: constraint violation") from e
+        except SQLAlchemyError as e:
+            raise RuntimeError("Database operation failed") from e
+
     @staticmethod
     async def get_by_id_for_session(
         session: AsyncSession, package_id: UUID, session_uid: UUID
-    ) -> Optional[Package]:
-        stmt = (
-            select(Package)
-            .where(
-                and_(Package.id == package_id, Package.user_session_uid == session_uid)
+    ) -> Optional[Row]:
+        stmt = lambda_stmt(
+            lambda: _detail_select().where(
+                Package.id == package_id, Package.user_session_uid == session_uid
             )
-            .options(selectinload(Package.type))
         )
         result = await session.execute(stmt)
-        return result.scalar_one_or_none()
+        return result.one_or_none()
+
+    @staticmethod
+    def _with_session_filters(
+        stmt: StatementLambdaElement,
+        type_id: Optional[int],
+        has_delivery_cost: Optional[bool],
+    ) -> StatementLambdaElement:
+        if type_id is not None:
+            stmt += lambda s: s.where(Package.type_id == type_id)
+        if has_delivery_cost is True:
+            stmt += lambda s: s.where(Package.package_delivery_cost_rub.is_not(None))
+        elif has_delivery_cost is False:
+            stmt += lambda s: s.where(Package.package_delivery_cost_rub.is_(None))
+        return stmt
 
     @staticmethod
     async def list_for_session(
@@ -46,45 +96,210 @@ class PackagesCRUD:
         has_delivery_cost: Optional[bool] = None,
         page: int = 1,
         size: int = 20,
-    ) -> tuple[Sequence[tuple[Package, PackageType]], int]:
-        filters = [Package.user_session_uid == session_uid]
-        if type_id is not None:
-            filters.append(Package.type_id == type_id)
-        if has_delivery_cost is True:
-            filters.append(Package.package_delivery_cost_rub.is_not(None))
-        elif has_delivery_cost is False:
-            filters.append(Package.package_delivery_cost_rub.is_(None))
-
-        base_stmt: Select = (
-            select(Package, PackageType)
-            .join(PackageType, Package.type_id == PackageType.id)
-            .where(and_(*filters))
-            .order_by(Package.created_at.desc())
-        )
+        after: Optional[tuple[datetime, UUID]] = None,
+        with_total: bool = True,
+    ) -> tuple[Sequence[Row], Optional[int]]:
+        """Посылки сессии в порядке (created_at, id) по убыванию.
 
-        count_stmt = select(func.count()).select_from(base_stmt.subquery())
-        total = (await session.execute(count_stmt)).scalar_one()
+        Если передан after, используется keyset-пагинация: выбираются строки
+        строго после указанной пары, а page игнорируется. Запросы собираются
+        через lambda_stmt, поэтому их компиляция кэшируется, а строки
+        возвращаются кортежами колонок без загрузки ORM-объектов.
+        """
+        total: Optional[int] = None
+        if with_total:
+            count_stmt = PackagesCRUD._with_session_filters(
+                lambda_stmt(
+                    lambda: select(func.count())
+                    .select_from(Package)
+                    .where(Package.user_session_uid == session_uid)
+                ),
+                type_id,
+                has_delivery_cost,
+            )
+            total = int((await session.execute(count_stmt)).scalar_one())
 
-        stmt = base_stmt.offset((page - 1) * size).limit(size)
+        stmt = PackagesCRUD._with_session_filters(
+            lambda_stmt(
+                lambda: _detail_select().where(Package.user_session_uid == session_uid)
+            ),
+            type_id,
+            has_delivery_cost,
+        )
+        stmt += lambda s: s.order_by(Package.created_at.desc(), Package.id.desc())
+        if after is not None:
+            after_created_at, after_id = after
+            stmt += lambda s: s.where(
+                tuple_(Package.created_at, Package.id)
+                < tuple_(after_created_at, after_id)
+            ).limit(size)
+        else:
+            offset = (page - 1) * size
+            stmt += lambda s: s.offset(offset).limit(size)
         result = await session.execute(stmt)
-        fetched = result.all()
-        rows: list[tuple[Package, PackageType]] = [(row[0], row[1]) for row in fetched]
-        return rows, int(total)
+        return result.all(), total
+
+    @staticmethod
+    async def stream_for_session(
+        session: AsyncSession,
+        session_uid: UUID,
+        *,
+        type_id: Optional[int] = None,
+        has_delivery_cost: Optional[bool] = None,
+        partition_size: int = 1000,
+    ) -> AsyncResult:
+        """Серверный курсор по посылкам сессии: строки читаются порциями."""
+        stmt = PackagesCRUD._with_session_filters(
+            lambda_stmt(
+                lambda: _detail_select().where(Package.user_session_uid == session_uid)
+            ),
+            type_id,
+            has_delivery_cost,
+        )
+        stmt += lambda s: s.order_by(Package.created_at.desc(), Package.id.desc())
+        return await session.stream(
+            stmt, execution_options={"yield_per": partition_size}
+        )
 
     @staticmethod
     async def update_delivery_cost(
         session: AsyncSession, package_id: UUID, delivery_cost: Decimal
-    ) -> Optional[Package]:
+    ) -> tuple[bool, bool]:
+        """Записывает стоимость, только если она ещё не рассчитана.
+
+        Возвращает пару (обновлена, посылка существует). Обе проверки
+        выполняются одним запросом: UPDATE в CTE и EXISTS по таблице.
+        """
+        try:
+            updated = (
+                update(Package)
+                .where(
+                    Package.id == package_id,
+                    Package.package_delivery_cost_rub.is_(None),
+                )
+                .values(package_delivery_cost_rub=delivery_cost)
+                .returning(Package.id)
+                .cte("updated")
+            )
+            stmt = select(
+                exists(select(updated.c.id)),
+                exists(select(Package.id).where(Package.id == package_id)),
+            )
+            was_updated, found = (await session.execute(stmt)).one()
+            return bool(was_updated), bool(found)
+        except SQLAlchemyError as e:
+            raise RuntimeError("Failed to update delivery cost") from e
+
+    @staticmethod
+    async def claim_unpriced(
+        session: AsyncSession,
+        *,
+        min_age: timedelta,
+        after: Optional[tuple[datetime, UUID]],
+        limit: int,
+    ) -> Sequence[Row]:
+        """Блокирует до limit посылок без стоимости в порядке (created_at, id).
+
+        Строки, занятые другой транзакцией (consumer или второй sweeper),
+        пропускаются. Сканирование идёт по частичному индексу
+        ix_packages_unpriced_created, продолжая с пары after.
+        """
+        stmt = select(
+            Package.id,
+            Package.weight,
+            Package.value_of_contents_usd,
+            Package.created_at,
+        ).where(
+            Package.package_delivery_cost_rub.is_(None),
+            # Порог считается по часам БД, как и server_default created_at
+            Package.created_at < func.now() - min_age,
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(Package.created_at, Package.id) > tuple_(*after))
+        stmt = (
+            stmt.order_by(Package.created_at.asc(), Package.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
         try:
-            stmt = select(Package).where(Package.id == package_id)
             result = await session.execute(stmt)
-            package = result.scalar_one_or_none()
+            return result.all()
+        except SQLAlchemyError as e:
+            raise RuntimeError("Failed to claim unpriced packages") from e
 
-            if package is None:
-                return None
+    @staticmethod
+    async def bulk_update_delivery_cost(
+        session: AsyncSession, delivery_costs: Mapping[UUID, Decimal]
+    ) -> set[UUID]:
+        """Обновляет стоимость доставки одним UPDATE ... FROM (VALUES ...).
 
-            package.package_delivery_cost_rub = delivery_cost
-            await session.flush()
-            return package
+        Строки с уже рассчитанной стоимостью не трогаются. Возвращает
+        идентификаторы посылок, которые действительно были обновлены.
+        """
+        if not delivery_costs:
+            return set()
+
+        costs = values(
+            column("id", PgUUID(as_uuid=True)),
+            column("cost", DECIMAL(10, 2)),
+            name="costs",
+        ).data(list(delivery_costs.items()))
+
+        try:
+            stmt = (
+                update(Package)
+                .where(
+                    Package.id == costs.c.id,
+                    Package.package_delivery_cost_rub.is_(None),
+                )
+                .values(package_delivery_cost_rub=costs.c.cost)
+                .returning(Package.id)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(stmt)
+            return set(result.scalars().all())
         except SQLAlchemyError as e:
-            raise RuntimeError("Failed to update delivery cost") from e
+            raise RuntimeError("Failed to bulk update delivery cost") from e
+
+    @staticmethod
+    async def bulk_update_delivery_cost_checked(
+        session: AsyncSession, delivery_costs: Mapping[UUID, Decimal]
+    ) -> tuple[set[UUID], set[UUID]]:
+        """Как bulk_update_delivery_cost, но сообщает и о существующих посылках.
+
+        Возвращает (обновлённые, существующие) за один запрос: UPDATE
+        выполняется в CTE, а SELECT по той же таблице VALUES находит посылки,
+        стоимость которых уже была записана.
+        """
+        if not delivery_costs:
+            return set(), set()
+
+        costs = (
+            values(
+                column("id", PgUUID(as_uuid=True)),
+                column("cost", DECIMAL(10, 2)),
+                name="costs",
+            )
+            .data(list(delivery_costs.items()))
+            .cte("costs")
+        )
+
+        try:
+            updated = (
+                update(Package)
+                .where(
+                    Package.id == costs.c.id,
+                    Package.package_delivery_cost_rub.is_(None),
+                )
+                .values(package_delivery_cost_rub=costs.c.cost)
+                .returning(Package.id)
+                .cte("updated")
+            )
+            stmt = select(Package.id, Package.id.in_(select(updated.c.id))).join(
+                costs, Package.id == costs.c.id
+            )
+            rows = (await session.execute(stmt)).all()
+            found = {pid for pid, _ in rows}
+            return {pid for pid, was_updated in rows if was_updated}, found
+        except SQLAlchemyError as e:
+            raise RuntimeError("Failed to bulk update delivery cost") from e
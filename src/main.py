@@ -1,16 +1,40 @@
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime
+import logging
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from src.core.app_settings import app_settings
+from src.core.metrics import CONTENT_TYPE, REGISTRY
 from .api.routers import router_v1
-from .services.middlewares import SecurityHeadersMiddleware
+from .services.admission import admission_metrics
+from .services.middlewares import RequestMetricsMiddleware, SecurityHeadersMiddleware
 from .services.exception_handlers import register_exception_handlers
+from .services.outbox_relay import outbox_relay
+from .services.package_types import package_type_catalog
+from .services.rabbitmq_producer import close_connection
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        await package_type_catalog.load()
+    except Exception as e:
+        # Справочник загрузится при первом обращении
+        logger.error(f"Failed to preload package types: {e}")
+    outbox_relay.start()
+    yield
+    await outbox_relay.stop()
+    await close_connection()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
+        lifespan=lifespan,
         title=app_settings.NAME,
         version=app_settings.VERSION,
         description=app_settings.DESCRIPTION,
@@ -24,6 +48,7 @@ def create_app() -> FastAPI:
         **app_settings.get_cors_config(),
     )
     app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RequestMetricsMiddleware)
 
     app.include_router(router_v1)
 
@@ -41,9 +66,15 @@ async def health_check():
         "status": "ok",
         "version": app_settings.VERSION,
         "timestamp": datetime.now().isoformat(),
+        "admission": [asdict(m) for m in admission_metrics()],
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "src.main:app",
@@ -7,7 +7,14 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 
 from alembic import context
 from src.core.db_settings import db_settings
-from src.models import Base, Package, PackageType  # noqa: F401
+from src.models import (  # noqa: F401
+    Base,
+    ExchangeRate,
+    ExchangeRateLease,
+    OutboxMessage,
+    Package,
+    PackageType,
+)
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
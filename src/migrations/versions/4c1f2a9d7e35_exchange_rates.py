@@ -0,0 +1,41 @@
+"""Exchange rates
+
+Revision ID: 4c1f2a9d7e35
+Revises: b3b68d68bce8
+Create Date: 2026-10-18 10:12:41.305219
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c1f2a9d7e35"
+down_revision: Union[str, Sequence[str], None] = "b3b68d68bce8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "exchange_rates",
+        sa.Column("currency_code", sa.String(length=3), nullable=False),
+        sa.Column("rate", sa.DECIMAL(precision=12, scale=4), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("currency_code"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("exchange_rates")
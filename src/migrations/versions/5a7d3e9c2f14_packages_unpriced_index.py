@@ -0,0 +1,67 @@
+"""Packages unpriced index
+
+Revision ID: 5a7d3e9c2f14
+Revises: d81f5e3a6b92
+Create Date: 2026-10-18 15:41:09.118265
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a7d3e9c2f14"
+down_revision: Union[str, Sequence[str], None] = "d81f5e3a6b92"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_if_invalid(name: str) -> None:
+    """Удаляет индекс, оставшийся INVALID после прерванного CONCURRENTLY.
+
+    Иначе IF NOT EXISTS при повторном запуске молча сохранит его.
+    """
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT 1 FROM pg_index "
+                "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+            ),
+            {"name": name},
+        )
+        .scalar()
+    )
+    if invalid:
+        op.drop_index(
+            name, table_name="packages", postgresql_concurrently=True, if_exists=True
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        _drop_if_invalid("ix_packages_unpriced_created")
+        op.create_index(
+            "ix_packages_unpriced_created",
+            "packages",
+            ["created_at", "id"],
+            postgresql_where=sa.text("package_delivery_cost_rub IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_packages_unpriced_created",
+            table_name="packages",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
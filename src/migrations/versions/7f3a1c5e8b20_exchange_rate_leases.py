@@ -0,0 +1,40 @@
+"""Exchange rate leases
+
+Revision ID: 7f3a1c5e8b20
+Revises: 5a7d3e9c2f14
+Create Date: 2026-10-18 18:04:27.512930
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7f3a1c5e8b20"
+down_revision: Union[str, Sequence[str], None] = "5a7d3e9c2f14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "exchange_rate_leases",
+        sa.Column("currency_code", sa.String(length=3), nullable=False),
+        sa.Column("lease_until", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("currency_code"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("exchange_rate_leases")
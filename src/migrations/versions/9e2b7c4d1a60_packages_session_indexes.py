@@ -0,0 +1,96 @@
+"""Packages session indexes
+
+Revision ID: 9e2b7c4d1a60
+Revises: 4c1f2a9d7e35
+Create Date: 2026-10-18 11:02:17.540392
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e2b7c4d1a60"
+down_revision: Union[str, Sequence[str], None] = "4c1f2a9d7e35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _drop_if_invalid(name: str) -> None:
+    """Удаляет индекс, оставшийся INVALID после прерванного CONCURRENTLY.
+
+    Иначе IF NOT EXISTS при повторном запуске молча сохранит его.
+    """
+    invalid = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                "SELECT 1 FROM pg_index "
+                "WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"
+            ),
+            {"name": name},
+        )
+        .scalar()
+    )
+    if invalid:
+        op.drop_index(
+            name, table_name="packages", postgresql_concurrently=True, if_exists=True
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_packages_session_created",
+            "ix_packages_session_type_created",
+            "ix_packages_session_unpriced_created",
+        ):
+            _drop_if_invalid(name)
+        op.create_index(
+            "ix_packages_session_created",
+            "packages",
+            ["user_session_uid", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_packages_session_type_created",
+            "packages",
+            [
+                "user_session_uid",
+                "type_id",
+                sa.text("created_at DESC"),
+                sa.text("id DESC"),
+            ],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_packages_session_unpriced_created",
+            "packages",
+            ["user_session_uid", sa.text("created_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("package_delivery_cost_rub IS NULL"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name in (
+            "ix_packages_session_unpriced_created",
+            "ix_packages_session_type_created",
+            "ix_packages_session_created",
+        ):
+            op.drop_index(
+                name,
+                table_name="packages",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -1,10 +1,15 @@
 from .base import Base
+from .exchange_rate import ExchangeRate, ExchangeRateLease
+from .outbox import OutboxMessage
 from .package import Package
 from .package_types import PackageType
 
 
 __all__ = [
     "Base",
+    "ExchangeRate",
+    "ExchangeRateLease",
+    "OutboxMessage",
     "Package",
     "PackageType",
 ]
@@ -0,0 +1,23 @@
+import datetime
+from decimal import Decimal
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DECIMAL, DateTime
+
+from .base import Base
+
+
+class ExchangeRate(Base):
+    __tablename__ = "exchange_rates"
+
+    currency_code: Mapped[str] = mapped_column(String(3), primary_key=True)
+    rate: Mapped[Decimal] = mapped_column(DECIMAL(12, 4), nullable=False)
+    fetched_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+
+class ExchangeRateLease(Base):
+    """Аренда обновления курса: пока она действует, источник опрашивает один процесс."""
+
+    __tablename__ = "exchange_rate_leases"
+
+    currency_code: Mapped[str] = mapped_column(String(3), primary_key=True)
+    lease_until: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
@@ -3,16 +3,44 @@ from typing import TYPE_CHECKING
 import uuid
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import UUID as PgUUID
-from sqlalchemy import String, Float, ForeignKey, DECIMAL
+from sqlalchemy import String, Float, ForeignKey, DECIMAL, Index, text
 
 from .base import Base
 
-
 if TYPE_CHECKING:
     from .package_types import PackageType
 
 
 class Package(Base):
+    __table_args__ = (
+        Index(
+            "ix_packages_session_created",
+            "user_session_uid",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_packages_session_type_created",
+            "user_session_uid",
+            "type_id",
+            text("created_at DESC"),
+            text("id DESC"),
+        ),
+        Index(
+            "ix_packages_session_unpriced_created",
+            "user_session_uid",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_where=text("package_delivery_cost_rub IS NULL"),
+        ),
+        Index(
+            "ix_packages_unpriced_created",
+            "created_at",
+            "id",
+            postgresql_where=text("package_delivery_cost_rub IS NULL"),
+        ),
+    )
+
     id: Mapped[uuid.UUID] = mapped_column(
         PgUUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Optional
+from typing import Any, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.core.app_settings import app_settings
 
 
 class PackageBase(BaseModel):
@@ -39,10 +41,27 @@ class PackageDetailRead(PackageRead):
 
 class PaginatedPackages(BaseModel):
     items: list[PackageDetailRead]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
+    next_cursor: Optional[str] = None
 
 
 class PackageCreateResponse(BaseModel):
     id: UUID
+
+
+class BulkPackageCreate(BaseModel):
+    items: list[Any] = Field(max_length=app_settings.BULK_MAX_ITEMS)
+
+
+class BulkPackageResult(BaseModel):
+    index: int
+    id: Optional[UUID] = None
+    errors: Optional[list[str]] = None
+
+
+class BulkPackageCreateResponse(BaseModel):
+    created: int
+    failed: int
+    items: list[BulkPackageResult]
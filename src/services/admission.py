@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+
+from src.core.admission_settings import (
+    AdmissionLimits,
+    AdmissionSettings,
+    admission_settings,
+)
+from src.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+admission_rejections = Counter(
+    "admission_rejections",
+    "Requests rejected by admission control",
+    labelnames=("endpoint",),
+)
+
+# Вес нового замера в сглаженной задержке
+LATENCY_SMOOTHING = 0.2
+DECREASE_FACTOR = 0.9
+
+
+@dataclass(frozen=True)
+class AdmissionMetrics:
+    endpoint: str
+    limit: int
+    in_flight: int
+    queued: int
+    admitted: int
+    rejected: int
+    latency_seconds: float
+
+
+class AdmissionController:
+    """Ограничение одновременных запросов к эндпоинту с короткой очередью.
+
+    Сверх лимита запрос ждёт в очереди не дольше QUEUE_TIMEOUT_SECONDS; при
+    переполненной очереди или по таймауту сразу отвечаем REJECT_STATUS с
+    Retry-After. Лимит подстраивается по задержке обработки (коммит в БД):
+    уменьшается в DECREASE_FACTOR раз, пока сглаженная задержка выше цели, и
+    растёт на 1 / limit за запрос, пока спрос упирается в лимит.
+    """
+
+    def __init__(self, endpoint: str, limits: AdmissionLimits, enabled: bool = True):
+        self.endpoint = endpoint
+        self.limits = limits
+        self.enabled = enabled
+        self._limit = float(
+            min(max(limits.INITIAL_LIMIT, limits.MIN_LIMIT), limits.MAX_LIMIT)
+        )
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._rejected = 0
+        self._latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._rejections = admission_rejections.labels(endpoint)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _reject(self) -> None:
+        self._rejected += 1
+        self._rejections.inc()
+        logger.debug(
+            "Rejecting %s: limit=%s in_flight=%s queued=%s",
+            self.endpoint,
+            self.limit,
+            self._in_flight,
+            len(self._waiters),
+        )
+        raise HTTPException(
+            status_code=self.limits.REJECT_STATUS,
+            detail="Service is overloaded, retry later",
+            headers={"Retry-After": str(self.limits.RETRY_AFTER_SECONDS)},
+        )
+
+    async def _acquire(self) -> None:
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        if len(self._waiters) >= self.limits.MAX_QUEUE:
+            self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=self.limits.QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            # Слот мог освободиться одновременно с таймаутом
+            if waiter.done() and not waiter.cancelled():
+                return
+            self._forget(waiter)
+            self._reject()
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                self._forget(waiter)
+            raise
+
+    def _forget(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        # Слот передаётся первому ожидающему, in_flight при этом не меняется
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._in_flight += 1
+
+    def _observe(self, latency: float) -> None:
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += LATENCY_SMOOTHING * (latency - self._latency)
+
+        now = time.monotonic()
+        if self._latency > self.limits.TARGET_LATENCY_SECONDS:
+            # Не чаще одного снижения за время ответа, чтобы не обвалить лимит
+            if now - self._last_decrease >= self._latency:
+                self._limit = max(
+                    float(self.limits.MIN_LIMIT), self._limit * DECREASE_FACTOR
+                )
+                self._last_decrease = now
+        elif self._waiters or self._in_flight >= self.limit:
+            self._limit = min(
+                float(self.limits.MAX_LIMIT), self._limit + 1 / self._limit
+            )
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        await self._acquire()
+        self._admitted += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._observe(time.monotonic() - started)
+            self._release_slot()
+
+    def metrics(self) -> AdmissionMetrics:
+        return AdmissionMetrics(
+            endpoint=self.endpoint,
+            limit=self.limit,
+            in_flight=self._in_flight,
+            queued=len(self._waiters),
+            admitted=self._admitted,
+            rejected=self._rejected,
+            latency_seconds=self._latency or 0.0,
+        )
+
+
+_controllers: dict[str, AdmissionController] = {}
+
+
+def get_admission_controller(
+    endpoint: str, settings: AdmissionSettings = admission_settings
+) -> AdmissionController:
+    controller = _controllers.get(endpoint)
+    if controller is None:
+        controller = AdmissionController(
+            endpoint, settings.get_limits(endpoint), enabled=settings.ENABLED
+        )
+        _controllers[endpoint] = controller
+    return controller
+
+
+def admission_metrics() -> list[AdmissionMetrics]:
+    return [controller.metrics() for controller in _controllers.values()]
+
+
+def _per_endpoint(field_name: str):
+    return lambda: [
+        ((m.endpoint,), getattr(m, field_name)) for m in admission_metrics()
+    ]
+
+
+Gauge(
+    "admission_limit",
+    "Current concurrency limit of admission control",
+    labelnames=("endpoint",),
+    callback=_per_endpoint("limit"),
+)
+Gauge(
+    "admission_in_flight",
+    "Requests currently holding an admission slot",
+    labelnames=("endpoint",),
+    callback=_per_endpoint("in_flight"),
+)
+Gauge(
+    "admission_queue_depth",
+    "Requests waiting for an admission slot",
+    labelnames=("endpoint",),
+    callback=_per_endpoint("queued"),
+)
@@ -1,46 +1,180 @@
 from decimal import Decimal
 import httpx
 import logging
-import datetime
+import time
 from typing import Optional
 import asyncio
 
+from src.core.metrics import Counter, Gauge
+from src.services.rate_store import PostgresRateStore, RateStore, StoredRate
+
 logger = logging.getLogger(__name__)
 
+CBR_DAILY_URL = "https://www.cbr-xml-daily.ru/daily_json.js"
+
+rate_cache_requests = Counter(
+    "currency_rate_cache_requests",
+    "USD rate lookups by cache result",
+    labelnames=("result",),
+)
+_cache_hits = rate_cache_requests.labels("hit")
+_cache_misses = rate_cache_requests.labels("miss")
+
+
+def _cache_hit_ratio() -> float:
+    total = _cache_hits.value + _cache_misses.value
+    return _cache_hits.value / total if total else 0.0
+
+
+Gauge(
+    "currency_rate_cache_hit_ratio",
+    "Share of USD rate lookups served from cache",
+    callback=_cache_hit_ratio,
+)
+
 
 class CurrencyService:
-    def __init__(self, cache_duration_minutes: int = 30):
+    """Курс USD с кэшем stale-while-revalidate.
+
+    Горячий путь (get_usd_rate) не берёт блокировок: он читает кортеж
+    (курс, время получения), а обновление выполняется в фоне. Пока
+    обновление не завершилось, отдаётся последний известный курс.
+
+    Если задано хранилище (store), курс берётся из него при холодном старте
+    и при недоступности источника, а запрос к ЦБ делает только один процесс.
+    """
+
+    def __init__(
+        self,
+        cache_duration_minutes: int = 30,
+        refresh_ahead_minutes: int = 5,
+        retry_interval_seconds: float = 30.0,
+        store: Optional[RateStore] = None,
+    ):
         self.cache_duration = cache_duration_minutes * 60
-        self.chached_rate: Optional[float] = None
-        self.cache_time: Optional[datetime.datetime] = None
-        self.cache_lock = asyncio.Lock()
+        self.refresh_ahead = min(refresh_ahead_minutes * 60, self.cache_duration)
+        self.retry_interval = retry_interval_seconds
+        self.store = store
+        self._retry_after = 0.0
+        self._cached: Optional[tuple[Decimal, float]] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    def _needs_refresh(self, cache_time: float) -> bool:
+        return time.monotonic() - cache_time >= self.cache_duration - self.refresh_ahead
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=10.0)
+        return self._client
+
+    async def _fetch_rate(self) -> Decimal:
+        response = await self._get_client().get(CBR_DAILY_URL)
+        response.raise_for_status()
+        data = response.json()
+        return Decimal(str(data["Valute"]["USD"]["Value"]))
 
-    def _is_cache_valid(self) -> bool:
-        if self.chached_rate is None or self.cache_time is None:
-            return False
-        return datetime.datetime.now() - self.cache_time < datetime.timedelta(
-            seconds=self.cache_duration
-        )
+    def _adopt(self, stored: StoredRate) -> Decimal:
+        self._cached = (stored.rate, time.monotonic() - stored.age_seconds())
+        return stored.rate
+
+    async def _refresh_from_store(self, store: RateStore) -> Decimal:
+        try:
+            stored = await store.refresh(
+                "USD", self.cache_duration - self.refresh_ahead, self._fetch_rate
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing USD rate, falling back to store: {e}")
+            stored = await store.load("USD")
+            if stored is None:
+                raise
+        if stored is None:
+            raise RuntimeError("USD rate is not available yet")
+        if stored.age_seconds() >= self.cache_duration - self.refresh_ahead:
+            self._retry_after = time.monotonic() + self.retry_interval
+        return self._adopt(stored)
+
+    async def _refresh(self) -> Decimal:
+        try:
+            if self.store is not None:
+                return await self._refresh_from_store(self.store)
+            rate = await self._fetch_rate()
+        except Exception as e:
+            self._retry_after = time.monotonic() + self.retry_interval
+            logger.error(f"Error getting USD rate: {e}")
+            raise
+        self._cached = (rate, time.monotonic())
+        return rate
+
+    def _start_refresh(self) -> asyncio.Task:
+        # Одновременно выполняется не более одного запроса к ЦБ
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+            self._refresh_task.add_done_callback(self._consume_refresh_error)
+        return self._refresh_task
+
+    @staticmethod
+    def _consume_refresh_error(task: asyncio.Task) -> None:
+        if not task.cancelled():
+            task.exception()
 
     async def get_usd_rate(self) -> Decimal:
-        now = datetime.datetime.now()
-        async with self.cache_lock:
+        cached = self._cached
+        if cached is not None:
+            rate, cache_time = cached
+            if (
+                self._needs_refresh(cache_time)
+                and time.monotonic() >= self._retry_after
+            ):
+                self._start_refresh()
+            _cache_hits.inc()
+            return rate
+
+        _cache_misses.inc()
+        return await asyncio.shield(self._start_refresh())
+
+    async def _run_refresher(self) -> None:
+        while True:
+            cached = self._cached
+            if cached is None:
+                delay = 0.0
+            else:
+                age = time.monotonic() - cached[1]
+                delay = max(
+                    0.0,
+                    self.cache_duration - self.refresh_ahead - age,
+                    self._retry_after - time.monotonic(),
+                )
+            await asyncio.sleep(delay)
+
             try:
-                if self._is_cache_valid():
-                    return self.chached_rate  # type: ignore
-
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        "https://www.cbr-xml-daily.ru/daily_json.js"
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                self.chached_rate = Decimal(data["Valute"]["USD"]["Value"])  # type: ignore
-                self.cache_time = now
-                return self.chached_rate  # type: ignore
-            except Exception as e:
-                logger.error(f"Error getting USD rate: {e}")
+                await asyncio.shield(self._start_refresh())
+            except asyncio.CancelledError:
                 raise
+            except Exception:
+                await asyncio.sleep(self.retry_interval)
+
+    async def start(self) -> None:
+        if self.store is not None and self._cached is None:
+            try:
+                stored = await self.store.load("USD")
+                if stored is not None:
+                    self._adopt(stored)
+            except Exception as e:
+                logger.error(f"Error loading USD rate from store: {e}")
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._run_refresher())
+
+    async def close(self) -> None:
+        for task in (self._refresher, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+        self._refresher = None
+        self._refresh_task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
 
-currency_service = CurrencyService()
+currency_service = CurrencyService(store=PostgresRateStore())
@@ -26,6 +26,7 @@ def register_exception_handlers(app: FastAPI) -> None:
                 "error": "HTTPError",
                 "detail": exc.detail,
             },
+            headers=exc.headers,
         )
 
     @app.exception_handler(SQLAlchemyError)
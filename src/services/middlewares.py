@@ -1,10 +1,90 @@
-from starlette.middleware.base import BaseHTTPMiddleware
+import time
 
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        if not request.url.path.startswith("/docs"):
-            response.headers["Content-Security-Policy"] = "default-src 'self'"
-            response.headers["X-XSS-Protection"] = "1; mode=block"
-        return response
+from src.core.metrics import Histogram
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route name",
+    labelnames=("route", "method", "status"),
+)
+# Остальные методы сводятся в "other", чтобы клиент не мог плодить серии
+KNOWN_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+
+class SecurityHeadersMiddleware:
+    """Добавляет заголовки безопасности ко всем ответам, кроме /docs.
+
+    Чистый ASGI: заголовки дописываются в сообщение http.response.start,
+    тело ответа (в том числе потоковое) проходит без изменений.
+    """
+
+    HEADERS = {
+        "Content-Security-Policy": "default-src 'self'",
+        "X-XSS-Protection": "1; mode=block",
+    }
+
+    def __init__(self, app: ASGIApp, excluded_prefix: str = "/docs"):
+        self.app = app
+        self.excluded_prefix = excluded_prefix
+        self._raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in self.HEADERS.items()
+        ]
+        self._names = {name for name, _ in self._raw_headers}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.excluded_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    (name, value)
+                    for name, value in message.get("headers", ())
+                    if name.lower() not in self._names
+                ]
+                headers.extend(self._raw_headers)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class RequestMetricsMiddleware:
+    """Гистограмма задержки HTTP-запросов по имени маршрута.
+
+    Имя берётся из scope["route"], который FastAPI заполняет при
+    сопоставлении маршрута; запросы мимо маршрутов попадают в "unmatched",
+    чтобы число серий не зависело от присланных путей.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        method = scope["method"]
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            request_duration.labels(
+                getattr(route, "name", None) or "unmatched",
+                method if method in KNOWN_METHODS else "other",
+                status,
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Optional
+
+from src.core.app_settings import app_settings
+from src.core.db_settings import db_manager
+from src.crud.outbox import OutboxCRUD
+from .rabbitmq_producer import rabbitmq_producer
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxRelay:
+    """Переносит сообщения из таблицы outbox в packages_exchange.
+
+    Строки outbox пишутся в той же транзакции, что и посылка, поэтому worker
+    получает сообщение только о закоммиченной строке. Запись удаляется после
+    подтверждения брокером; при сбое между публикацией и удалением сообщение
+    будет отправлено повторно (at-least-once).
+    """
+
+    def __init__(
+        self,
+        batch_size: int = app_settings.OUTBOX_BATCH_SIZE,
+        poll_interval: float = app_settings.OUTBOX_POLL_INTERVAL_SECONDS,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def relay_batch(self) -> int:
+        async with db_manager.session_factory() as session:
+            messages = await OutboxCRUD.claim_batch(session, self.batch_size)
+            if not messages:
+                return 0
+
+            results = await rabbitmq_producer.publish_many(
+                [message.payload for message in messages]
+            )
+            published = [m.id for m, ok in zip(messages, results) if ok]
+            await OutboxCRUD.delete_many(session, published)
+            await session.commit()
+
+        if len(published) < len(messages):
+            logger.warning(
+                "Outbox relay published %s of %s messages",
+                len(published),
+                len(messages),
+            )
+            # Брокер недоступен: не крутим цикл, ждём следующего опроса
+            return 0
+        return len(messages)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                while await self.relay_batch() == self.batch_size:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox relay error: {e}")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+outbox_relay = OutboxRelay()
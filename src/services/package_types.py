@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
 import logging
-from typing import List
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from pydantic import TypeAdapter
 
 from src.core.db_settings import get_session
 from src.crud.package_types import PackageTypesCRUD
@@ -8,13 +14,82 @@ from src.schemas.packagetypes import PackageTypeRead
 
 logger = logging.getLogger(__name__)
 
+_types_adapter = TypeAdapter(list[PackageTypeRead])
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    types: list[PackageTypeRead]
+    names: dict[int, str]
+    body: bytes
+    etag: str
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+class PackageTypeCatalog:
+    """Справочник типов посылок в памяти процесса.
+
+    Таблица packagetypes заполняется миграцией и почти не меняется, поэтому
+    справочник загружается при старте и перечитывается по TTL или после
+    invalidate(). Ответ для GET /package_types сериализуется один раз.
+
+    Неизвестный type_id из запроса вызывает внеплановую перезагрузку не чаще
+    раза в min_reload_seconds, иначе клиент мог бы заставить каждый запрос
+    читать справочник из БД.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, min_reload_seconds: float = 10.0):
+        self.ttl = ttl_seconds
+        self.min_reload_seconds = min_reload_seconds
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = asyncio.Lock()
 
-class PackageTypeService:
-    async def get_all_types(self) -> List[PackageTypeRead]:
-        logger.info("Listing package types")
+    def _is_fresh(self, snapshot: Optional[CatalogSnapshot]) -> bool:
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def load(self) -> CatalogSnapshot:
         async for session in get_session():
             rows = await PackageTypesCRUD.get_all(session)
-        return [PackageTypeRead.model_validate(row) for row in rows]
+        types = [PackageTypeRead.model_validate(row) for row in rows]
+        body = _types_adapter.dump_json(types)
+        snapshot = CatalogSnapshot(
+            types=types,
+            names={t.id: t.name for t in types},
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"',
+        )
+        self._snapshot = snapshot
+        logger.info("Loaded %s package types", len(types))
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if self._is_fresh(snapshot):
+            return snapshot  # type: ignore[return-value]
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if self._is_fresh(snapshot):
+                return snapshot  # type: ignore[return-value]
+            return await self.load()
+
+    async def get_names(self, type_ids: Iterable[int]) -> dict[int, str]:
+        snapshot = await self.get()
+        if set(type_ids) <= snapshot.names.keys():
+            return snapshot.names
+        if time.monotonic() - snapshot.loaded_at < self.min_reload_seconds:
+            # Снимок свежий: неизвестный тип, скорее всего, не существует
+            return snapshot.names
+
+        async with self._lock:
+            # Пока ждали блокировку, справочник мог перечитать другой запрос
+            if self._snapshot is snapshot or self._snapshot is None:
+                return (await self.load()).names
+            return self._snapshot.names
+
 
+package_type_catalog = PackageTypeCatalog()
 
-package_type_service = PackageTypeService()
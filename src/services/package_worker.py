@@ -1,13 +1,14 @@
 import logging
+from datetime import datetime, timedelta
 from decimal import Decimal
 from uuid import UUID
-from typing import Optional
+from typing import Mapping, Optional
 
 from sqlalchemy.exc import SQLAlchemyError
 
 from src.core.db_settings import db_manager
 from src.crud.packages import PackagesCRUD
-from src.models.package import Package
+from src.services import pricing
 
 logger = logging.getLogger(__name__)
 
@@ -15,24 +16,34 @@ logger = logging.getLogger(__name__)
 class PackageWorkerService:
     async def update_package_delivery_cost(
         self, package_id: UUID, delivery_cost: Decimal
-    ) -> Optional[Package]:
+    ) -> bool:
+        """Записывает стоимость доставки; повторная запись ничего не меняет.
+
+        Возвращает True, если стоимость посылки записана (сейчас или ранее).
+        """
         try:
             async with db_manager.session_factory() as session:
-                package = await PackagesCRUD.update_delivery_cost(
+                updated, found = await PackagesCRUD.update_delivery_cost(
                     session, package_id, delivery_cost
                 )
-                if package:
+                if updated:
                     await session.commit()
                     logger.info(
                         "Updated delivery cost for package %s: %s RUB",
                         package_id,
                         delivery_cost,
                     )
-                else:
-                    logger.warning(
-                        "Package %s not found for delivery cost update", package_id
+                    return True
+                if found:
+                    logger.info(
+                        "Delivery cost for package %s is already set, skipping",
+                        package_id,
                     )
-                return package
+                    return True
+                logger.warning(
+                    "Package %s not found for delivery cost update", package_id
+                )
+                return False
         except SQLAlchemyError as e:
             logger.error(
                 "Failed to update delivery cost for package %s: %s", package_id, e
@@ -46,5 +57,68 @@ class PackageWorkerService:
             )
             raise
 
+    async def update_delivery_costs_bulk(
+        self, delivery_costs: Mapping[UUID, Decimal]
+    ) -> set[UUID]:
+        """Возвращает посылки, стоимость которых записана (сейчас или ранее)."""
+        try:
+            async with db_manager.session_factory() as session:
+                # Найденные, но не обновлённые посылки уже рассчитаны (повтор)
+                updated, found = await PackagesCRUD.bulk_update_delivery_cost_checked(
+                    session, delivery_costs
+                )
+                if updated:
+                    await session.commit()
+                logger.info(
+                    "Updated delivery cost for %s of %s packages, %s already set",
+                    len(updated),
+                    len(delivery_costs),
+                    len(found - updated),
+                )
+                return found
+        except SQLAlchemyError as e:
+            logger.error("Failed to bulk update delivery costs: %s", e)
+            raise RuntimeError(f"Database operation failed: {e}") from e
+
+    async def reprice_unpriced_batch(
+        self,
+        *,
+        usd_rate: Decimal,
+        min_age: timedelta,
+        after: Optional[tuple[datetime, UUID]],
+        limit: int,
+    ) -> tuple[int, int, Optional[tuple[datetime, UUID]]]:
+        """Досчитывает одну пачку посылок без стоимости.
+
+        Возвращает число заблокированных и обновлённых посылок и ключ
+        (created_at, id), с которого продолжать сканирование.
+        """
+        try:
+            async with db_manager.session_factory() as session:
+                rows = await PackagesCRUD.claim_unpriced(
+                    session, min_age=min_age, after=after, limit=limit
+                )
+                if not rows:
+                    return 0, 0, after
+
+                kopecks = pricing.calculate_delivery_costs_kopecks(
+                    [pricing.to_scaled(r.weight, pricing.WEIGHT_SCALE) for r in rows],
+                    [
+                        pricing.to_scaled(r.value_of_contents_usd, pricing.VALUE_SCALE)
+                        for r in rows
+                    ],
+                    pricing.to_scaled(usd_rate, pricing.RATE_SCALE),
+                )
+                updated = await PackagesCRUD.bulk_update_delivery_cost(
+                    session,
+                    {r.id: pricing.from_kopecks(k) for r, k in zip(rows, kopecks)},
+                )
+                await session.commit()
+                last = rows[-1]
+                return len(rows), len(updated), (last.created_at, last.id)
+        except SQLAlchemyError as e:
+            logger.error("Failed to reprice unpriced packages: %s", e)
+            raise RuntimeError(f"Database operation failed: {e}") from e
+
 
 package_worker_service = PackageWorkerService()
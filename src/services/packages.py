@@ -1,29 +1,141 @@
+import base64
+import binascii
+import csv
+import datetime
+import io
+import json
 import logging
 import uuid
-from typing import Optional
+from typing import Any, AsyncIterator, Literal, Optional
 
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 
-from src.core.db_settings import get_session
+from src.core.app_settings import app_settings
+from src.core.db_settings import db_manager
+from src.core.unit_of_work import UnitOfWork
+from src.crud.outbox import OutboxCRUD
 from src.crud.packages import PackagesCRUD
 from src.schemas.package import (
+    BulkPackageCreate,
+    BulkPackageCreateResponse,
+    BulkPackageResult,
     PackageCreate,
     PackageCreateResponse,
     PackageDetailRead,
     PaginatedPackages,
 )
 from src.models.package import Package
-from .rabbitmq_producer import rabbitmq_producer
-
+from .package_types import package_type_catalog
+from .outbox_relay import outbox_relay
 
 logger = logging.getLogger(__name__)
 
 
+def _encode_cursor(created_at: datetime.datetime, package_id: uuid.UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(package_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, package_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(package_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from e
+
+
+def _to_message_payload(package_id: uuid.UUID, data: PackageCreate) -> dict[str, Any]:
+    payload = data.model_dump()
+    payload["id"] = str(package_id)
+    payload["value_of_contents_usd"] = str(data.value_of_contents_usd)
+    return payload
+
+
+EXPORT_COLUMNS = (
+    "id",
+    "name",
+    "type_id",
+    "type_name",
+    "weight",
+    "value_of_contents_usd",
+    "package_delivery_cost_rub",
+    "created_at",
+)
+
+
+def _to_detail(row: Any, type_names: dict[int, str]) -> PackageDetailRead:
+    # Значения пришли из БД с нужными типами, повторная валидация не нужна
+    return PackageDetailRead.model_construct(
+        id=row.id,
+        name=row.name,
+        type_id=row.type_id,
+        type_name=type_names.get(row.type_id, ""),
+        weight=row.weight,
+        value_of_contents_usd=row.value_of_contents_usd,
+        package_delivery_cost_rub=row.package_delivery_cost_rub,
+    )
+
+
+def _export_values(row: Any, type_names: dict[int, str]) -> list[Any]:
+    cost = row.package_delivery_cost_rub
+    return [
+        str(row.id),
+        row.name,
+        row.type_id,
+        type_names.get(row.type_id, ""),
+        row.weight,
+        str(row.value_of_contents_usd),
+        str(cost) if cost is not None else None,
+        row.created_at.isoformat(),
+    ]
+
+
+def _too_many_items() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"At most {app_settings.BULK_MAX_ITEMS} items per request",
+    )
+
+
+def _parse_bulk_body(body: bytes, ndjson: bool) -> list[Any]:
+    """Разбирает тело запроса в список элементов.
+
+    Строки NDJSON, которые не удалось разобрать, возвращаются как исключения,
+    чтобы ошибка попала в результат конкретного элемента. Разбор
+    прекращается, как только элементов становится больше BULK_MAX_ITEMS.
+    """
+    if not ndjson:
+        try:
+            return list(BulkPackageCreate.model_validate_json(body).items)
+        except ValidationError as e:
+            if any(err["type"] == "too_long" for err in e.errors()):
+                raise _too_many_items() from e
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Body must be a JSON object with an 'items' list",
+            ) from e
+
+    items: list[Any] = []
+    for line in io.BytesIO(body):
+        if not line.strip():
+            continue
+        if len(items) == app_settings.BULK_MAX_ITEMS:
+            raise _too_many_items()
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+
 class PackageService:
     async def register_package(
-        self, *, session_uid: uuid.UUID, data: PackageCreate
+        self, *, uow: UnitOfWork, session_uid: uuid.UUID, data: PackageCreate
     ) -> PackageCreateResponse:
-        # Note: In production we would publish to RabbitMQ here instead of direct DB writes
         logger.info("Registering package for session %s", session_uid)
         package_id = uuid.uuid4()
         new_package = Package(
@@ -37,23 +149,15 @@ class PackageService:
         )
 
         try:
-            new_package_dict = data.model_dump()
-            new_package_dict["id"] = str(package_id)
-            new_package_dict["value_of_contents_usd"] = str(data.value_of_contents_usd)
-
-            success = await rabbitmq_producer.publish_with_confirmation(
-                new_package_dict
-            )
+            new_package_dict = _to_message_payload(package_id, data)
 
-            if not success:
-                logger.error(f"Failed to send package {package_id} to the queue")
-                raise HTTPException(
-                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                    detail="Service temporarily unavailable. Please try again later.",
-                )
-            async for session in get_session():
-                await PackagesCRUD.create(session, new_package)
-                await session.commit()
+            # Посылка и сообщение для брокера фиксируются одной транзакцией,
+            # публикацию выполняет outbox relay после коммита
+            session = await uow.session()
+            await PackagesCRUD.create(session, new_package)
+            await OutboxCRUD.add(session, package_id, new_package_dict)
+            await uow.commit(written_by=session_uid)
+            outbox_relay.notify()
         except ValueError as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -67,59 +171,188 @@ class PackageService:
 
         return PackageCreateResponse(id=new_package.id)
 
+    async def register_packages_bulk(
+        self, *, uow: UnitOfWork, session_uid: uuid.UUID, body: bytes, ndjson: bool
+    ) -> BulkPackageCreateResponse:
+        raw_items = _parse_bulk_body(body, ndjson)
+        logger.info(
+            "Registering %s packages in bulk for session %s",
+            len(raw_items),
+            session_uid,
+        )
+
+        results: list[BulkPackageResult] = []
+        validated: list[tuple[int, PackageCreate]] = []
+        for index, raw in enumerate(raw_items):
+            if isinstance(raw, Exception):
+                results.append(
+                    BulkPackageResult(index=index, errors=[f"Invalid JSON: {raw}"])
+                )
+                continue
+            try:
+                validated.append((index, PackageCreate.model_validate(raw)))
+            except ValidationError as e:
+                errors = [
+                    ": ".join(
+                        filter(None, [".".join(map(str, err["loc"])), err["msg"]])
+                    )
+                    for err in e.errors()
+                ]
+                results.append(BulkPackageResult(index=index, errors=errors))
+
+        type_names = await package_type_catalog.get_names(
+            [data.type_id for _, data in validated]
+        )
+        package_rows: list[dict[str, Any]] = []
+        outbox_rows: list[dict[str, Any]] = []
+        for index, data in validated:
+            if data.type_id not in type_names:
+                results.append(
+                    BulkPackageResult(index=index, errors=["type_id: Unknown type"])
+                )
+                continue
+
+            package_id = uuid.uuid4()
+            package_rows.append(
+                {
+                    "id": package_id,
+                    "name": data.name,
+                    "type_id": data.type_id,
+                    "weight": data.weight,
+                    "value_of_contents_usd": data.value_of_contents_usd,
+                    "user_session_uid": session_uid,
+                }
+            )
+            outbox_rows.append(
+                {
+                    "package_id": package_id,
+                    "payload": _to_message_payload(package_id, data),
+                }
+            )
+            results.append(BulkPackageResult(index=index, id=package_id))
+
+        if package_rows:
+            try:
+                # Соединение берётся только после разбора и проверки тела
+                session = await uow.session()
+                await PackagesCRUD.create_many(session, package_rows)
+                await OutboxCRUD.add_many(session, outbox_rows)
+                await uow.commit(written_by=session_uid)
+                outbox_relay.notify()
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=str(e),
+                )
+            except RuntimeError:
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="Database operation failed",
+                )
+
+        return BulkPackageCreateResponse(
+            created=len(package_rows),
+            failed=len(results) - len(package_rows),
+            items=sorted(results, key=lambda r: r.index),
+        )
+
     async def get_package_by_id(
-        self, *, session_uid: uuid.UUID, package_id: uuid.UUID
+        self, *, uow: UnitOfWork, session_uid: uuid.UUID, package_id: uuid.UUID
     ) -> PackageDetailRead:
-        async for session in get_session():
-            pkg = await PackagesCRUD.get_by_id_for_session(
-                session, package_id, session_uid
-            )
+        pkg = await PackagesCRUD.get_by_id_for_session(
+            await uow.read_session(session_uid), package_id, session_uid
+        )
+        await uow.release()
         if pkg is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Package not found"
             )
-        return PackageDetailRead(
-            id=pkg.id,
-            name=pkg.name,
-            type_id=pkg.type_id,
-            type_name=pkg.type.name if pkg.type else "",
-            weight=pkg.weight,
-            value_of_contents_usd=pkg.value_of_contents_usd,
-            package_delivery_cost_rub=pkg.package_delivery_cost_rub,
-        )
+        type_names = await package_type_catalog.get_names([pkg.type_id])
+        return _to_detail(pkg, type_names)
 
     async def list_packages(
         self,
         *,
+        uow: UnitOfWork,
         session_uid: uuid.UUID,
         type_id: Optional[int],
         has_delivery_cost: Optional[bool],
         page: int,
         size: int,
+        cursor: Optional[str] = None,
+        include_total: Optional[bool] = None,
     ) -> PaginatedPackages:
-        async for session in get_session():
-            rows, total = await PackagesCRUD.list_for_session(
+        after = _decode_cursor(cursor) if cursor else None
+        # Подсчёт общего количества по умолчанию только для режима страниц
+        with_total = include_total if include_total is not None else after is None
+
+        rows, total = await PackagesCRUD.list_for_session(
+            await uow.read_session(session_uid),
+            session_uid,
+            type_id=type_id,
+            has_delivery_cost=has_delivery_cost,
+            page=page,
+            size=size,
+            after=after,
+            with_total=with_total,
+        )
+        await uow.release()
+
+        type_names = await package_type_catalog.get_names([p.type_id for p in rows])
+        items = [_to_detail(p, type_names) for p in rows]
+        next_cursor = None
+        if len(rows) == size:
+            last = rows[-1]
+            next_cursor = _encode_cursor(last.created_at, last.id)
+        return PaginatedPackages(
+            items=items,
+            total=total,
+            page=page if after is None else None,
+            size=size,
+            next_cursor=next_cursor,
+        )
+
+    async def export_packages(
+        self,
+        *,
+        session_uid: uuid.UUID,
+        type_id: Optional[int],
+        has_delivery_cost: Optional[bool],
+        fmt: Literal["ndjson", "csv"],
+    ) -> AsyncIterator[bytes]:
+        """Выгружает посылки сессии построчно, не накапливая их в памяти."""
+        type_names = (await package_type_catalog.get()).names
+
+        async with db_manager.read_session_factory(session_uid)() as session:
+            result = await PackagesCRUD.stream_for_session(
                 session,
                 session_uid,
                 type_id=type_id,
                 has_delivery_cost=has_delivery_cost,
-                page=page,
-                size=size,
             )
 
-        items = [
-            PackageDetailRead(
-                id=p.id,
-                name=p.name,
-                type_id=p.type_id,
-                type_name=t.name,
-                weight=p.weight,
-                value_of_contents_usd=p.value_of_contents_usd,
-                package_delivery_cost_rub=p.package_delivery_cost_rub,
-            )
-            for p, t in rows
-        ]
-        return PaginatedPackages(items=items, total=total, page=page, size=size)
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+                async for rows in result.partitions():
+                    writer.writerows(_export_values(row, type_names) for row in rows)
+                    yield buffer.getvalue().encode("utf-8")
+                    buffer.seek(0)
+                    buffer.truncate()
+                if buffer.tell():
+                    yield buffer.getvalue().encode("utf-8")
+                return
+
+            async for rows in result.partitions():
+                yield "".join(
+                    json.dumps(
+                        dict(zip(EXPORT_COLUMNS, _export_values(row, type_names))),
+                        ensure_ascii=False,
+                    )
+                    + "\n"
+                    for row in rows
+                ).encode("utf-8")
 
 
 package_service = PackageService()
@@ -0,0 +1,109 @@
+"""Расчёт стоимости доставки.
+
+base_cost_usd = weight * 0.5 + value_of_contents_usd * 0.01
+delivery_cost_rub = base_cost_usd * usd_rate
+
+Все величины переводятся в целые числа с фиксированным масштабом (вес в
+миллиграммах, стоимость в центах, курс в десятитысячных рубля), поэтому расчёт
+идёт в целочисленной арифметике без потерь, а округление до копеек явное:
+половина округляется от нуля (ROUND_HALF_UP).
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+from typing import Sequence
+
+WEIGHT_SCALE = 6  # миллиграммы
+VALUE_SCALE = 2  # центы
+RATE_SCALE = 4  # курс ЦБ публикуется с четырьмя знаками
+TARIFF_SCALE = 4
+
+WEIGHT_TARIFF_USD_PER_KG = Decimal("0.5")
+VALUE_TARIFF = Decimal("0.01")
+
+_WEIGHT_COEF = int(WEIGHT_TARIFF_USD_PER_KG.scaleb(TARIFF_SCALE))
+_VALUE_COEF = int(VALUE_TARIFF.scaleb(TARIFF_SCALE)) * 10 ** (
+    WEIGHT_SCALE - VALUE_SCALE
+)
+# base (USD * 10^10) * rate (10^4) -> копейки (10^2)
+_KOPECK_DIVISOR = 10 ** (WEIGHT_SCALE + TARIFF_SCALE + RATE_SCALE - 2)
+# До этой величины погрешность float * 10^scale много меньше 0.25
+_FLOAT_EXACT_LIMIT = 2.0**40
+
+
+def to_scaled(value: Decimal | float | int | str, scale: int) -> int:
+    """Переводит число в целое с масштабом 10^scale, округляя ROUND_HALF_UP.
+
+    float округляется так же, как его десятичная запись str(value); если
+    value * 10^scale далеко от половины, результат совпадает с round() и
+    перевод через строку не нужен.
+    """
+    if isinstance(value, float):
+        scaled = value * 10**scale
+        nearest = round(scaled)
+        if abs(scaled - nearest) < 0.25 and abs(scaled) < _FLOAT_EXACT_LIMIT:
+            return nearest
+        value = Decimal(str(value))
+    elif not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    scaled = value.scaleb(scale)
+    nearest = int(scaled)
+    if nearest == scaled:
+        return nearest
+    return int(scaled.to_integral_value(rounding=ROUND_HALF_UP))
+
+
+@lru_cache(maxsize=16)
+def _scaled_rate(usd_rate: Decimal) -> int:
+    # Курс меняется раз в несколько минут, а считается по нему каждая посылка
+    return to_scaled(usd_rate, RATE_SCALE)
+
+
+def from_kopecks(kopecks: int) -> Decimal:
+    return Decimal(kopecks).scaleb(-2)
+
+
+def _round_div(numerator: int, divisor: int) -> int:
+    quotient, remainder = divmod(abs(numerator), divisor)
+    if remainder * 2 >= divisor:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+
+def calculate_delivery_costs_kopecks(
+    weights_mg: Sequence[int], values_cents: Sequence[int], usd_rate_scaled: int
+) -> list[int]:
+    """Пакетный расчёт над уже масштабированными целыми значениями."""
+    if len(weights_mg) != len(values_cents):
+        raise ValueError("weights and values must have the same length")
+    return [
+        _round_div(
+            (w * _WEIGHT_COEF + v * _VALUE_COEF) * usd_rate_scaled, _KOPECK_DIVISOR
+        )
+        for w, v in zip(weights_mg, values_cents)
+    ]
+
+
+def calculate_delivery_costs(
+    weights: Sequence[float],
+    values_of_contents_usd: Sequence[Decimal],
+    usd_rate: Decimal,
+) -> list[Decimal]:
+    """Стоимость доставки в рублях для набора посылок, с точностью до копейки."""
+    kopecks = calculate_delivery_costs_kopecks(
+        [to_scaled(w, WEIGHT_SCALE) for w in weights],
+        [to_scaled(v, VALUE_SCALE) for v in values_of_contents_usd],
+        _scaled_rate(usd_rate),
+    )
+    return [from_kopecks(k) for k in kopecks]
+
+
+def calculate_delivery_cost(
+    weight: float, value_of_contents_usd: Decimal, usd_rate: Decimal
+) -> Decimal:
+    """Стоимость доставки одной посылки без промежуточных списков."""
+    base = (
+        to_scaled(weight, WEIGHT_SCALE) * _WEIGHT_COEF
+        + to_scaled(value_of_contents_usd, VALUE_SCALE) * _VALUE_COEF
+    )
+    return from_kopecks(_round_div(base * _scaled_rate(usd_rate), _KOPECK_DIVISOR))
@@ -1,20 +1,72 @@
+import asyncio
 import datetime
+import itertools
 import logging
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Sequence
 import aio_pika
+import aiormq
+from ..core.metrics import Counter, Histogram
 from ..core.mq_settings import mq_settings
 
 logger = logging.getLogger(__name__)
 
+publish_duration = Histogram(
+    "rabbitmq_publish_duration_seconds",
+    "Publish latency until broker confirmation, including in-flight wait",
+)
+publish_failures = Counter(
+    "rabbitmq_publish_failures",
+    "Publishes not confirmed by broker",
+    labelnames=("reason",),
+)
+_publish_nacked = publish_failures.labels("nack")
+_publish_errors = publish_failures.labels("error")
+
+
+async def declare_retry_queues(channel: aio_pika.abc.AbstractChannel) -> None:
+    """Объявляет TTL-очереди отложенных повторов.
+
+    Сообщение лежит в очереди своей ступени, пока не истечёт TTL, после чего
+    возвращается через packages_exchange обратно в package_processing.
+    """
+    for delay_ms in mq_settings.RETRY_DELAYS_MS:
+        await channel.declare_queue(
+            name=mq_settings.get_retry_queue_name(delay_ms),
+            durable=True,
+            arguments={
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "packages_exchange",
+                "x-dead-letter-routing-key": "package.process",
+            },
+        )
+
 
 class RabbitMQProducer:
-    def __init__(self) -> None:
+    """Публикация сообщений о посылках в packages_exchange.
+
+    Публикации распределяются по пулу каналов в режиме publisher confirms и
+    не ждут друг друга: у каждого сообщения свой future, который завершается
+    по ack/nack брокера. Общее число неподтверждённых сообщений ограничено.
+    """
+
+    def __init__(
+        self,
+        channel_pool_size: int = mq_settings.PUBLISH_CHANNELS,
+        max_in_flight: int = mq_settings.PUBLISH_MAX_IN_FLIGHT,
+    ) -> None:
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
         self.exchange: Optional[aio_pika.Exchange] = None
         self._is_connected = False
 
+        self.channel_pool_size = channel_pool_size
+        self._publish_exchanges: list[aio_pika.abc.AbstractExchange] = []
+        self._exchange_cycle: Optional[itertools.cycle] = None
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._connect_lock = asyncio.Lock()
+
     async def __aenter__(self):
         await self.connect()
         return self
@@ -51,18 +103,77 @@ class RabbitMQProducer:
             routing_key="failed_packages",
         )
 
+        await declare_retry_queues(self.channel)
+
+    async def _open_publish_channels(self):
+        self._publish_exchanges = []
+        for _ in range(self.channel_pool_size):
+            channel = await self.connection.channel(  # type: ignore
+                publisher_confirms=True, on_return_raises=True
+            )
+            self._publish_exchanges.append(
+                await channel.declare_exchange(
+                    name="packages_exchange",
+                    type=aio_pika.ExchangeType.DIRECT,
+                    durable=True,
+                )
+            )
+        self._exchange_cycle = itertools.cycle(self._publish_exchanges)
+
     async def connect(self):
+        async with self._connect_lock:
+            if self._is_connected:
+                return
+            try:
+                self.connection = await aio_pika.connect_robust(
+                    mq_settings.get_mq_url(),
+                )
+                self.channel = await self.connection.channel(publisher_confirms=True)
+                await self.channel.set_qos(prefetch_count=10)
+                await self._setup_exchanges_and_queues()
+                await self._open_publish_channels()
+                self._is_connected = True
+            except Exception as e:
+                logger.error(f"Ошибка подключения к RabbitMQ: {e}")
+                raise
+
+    @staticmethod
+    def _build_message(package_data: Dict[str, Any]) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=json.dumps(package_data, ensure_ascii=False).encode("utf-8"),
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            headers={
+                "content_type": "application/json",
+                "package_id": package_data["id"],
+                "created_at": datetime.datetime.now(),
+                "retry_count": 0,
+            },
+            priority=1,
+            message_id=package_data["id"],
+            expiration=3600000,  # 1 hour
+        )
+
+    async def _publish_confirmed(self, message: aio_pika.Message) -> bool:
+        started = time.perf_counter()
         try:
-            self.connection = await aio_pika.connect_robust(
-                mq_settings.get_mq_url(),
-            )
-            self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=10)
-            await self._setup_exchanges_and_queues()
-            self._is_connected = True
-        except Exception as e:
-            logger.error(f"Ошибка подключения к RabbitMQ: {e}")
+            async with self._in_flight:
+                exchange = next(self._exchange_cycle)  # type: ignore
+                confirmation = await exchange.publish(
+                    message=message,
+                    routing_key="package.process",
+                    mandatory=True,
+                    timeout=mq_settings.PUBLISH_CONFIRM_TIMEOUT_SECONDS,
+                )
+        except Exception:
+            _publish_errors.inc()
             raise
+        finally:
+            publish_duration.observe(time.perf_counter() - started)
+
+        if isinstance(confirmation, aiormq.spec.Basic.Ack):
+            return True
+        _publish_nacked.inc()
+        return False
 
     async def publish_package(self, package_data: Dict[str, Any]) -> bool:
         if not self._is_connected:
@@ -105,27 +216,7 @@ class RabbitMQProducer:
             await self.connect()
 
         try:
-            message_body = json.dumps(package_data, ensure_ascii=False)
-
-            message = aio_pika.Message(
-                body=message_body.encode("utf-8"),
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                headers={
-                    "content_type": "application/json",
-                    "package_id": package_data["id"],
-                    "created_at": datetime.datetime.now(),
-                    "retry_count": 0,
-                },
-                priority=1,
-                message_id=package_data["id"],
-                expiration=3600000,  # 1 hour
-            )
-
-            result = await self.exchange.publish(  # type: ignore
-                message=message,
-                routing_key="package.process",
-                mandatory=True,
-            )
+            result = await self._publish_confirmed(self._build_message(package_data))
 
             if result:
                 logger.info(
@@ -143,10 +234,45 @@ class RabbitMQProducer:
             )
             return False
 
+    async def publish_many(self, packages: Sequence[Dict[str, Any]]) -> list[bool]:
+        """Публикует пачку сообщений конвейером, не дожидаясь каждого ack.
+
+        Возвращает результат подтверждения для каждого сообщения по порядку.
+        """
+        if not packages:
+            return []
+        if not self._is_connected:
+            await self.connect()
+
+        results = await asyncio.gather(
+            *(
+                self._publish_confirmed(self._build_message(package_data))
+                for package_data in packages
+            ),
+            return_exceptions=True,
+        )
+
+        confirmed: list[bool] = []
+        for package_data, result in zip(packages, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    f"Error publishing package {package_data['id']} to RabbitMQ: {result}"
+                )
+                confirmed.append(False)
+            else:
+                confirmed.append(result)
+
+        logger.info(
+            "Published %s of %s packages to RabbitMQ", sum(confirmed), len(packages)
+        )
+        return confirmed
+
     async def close(self):
         if self._is_connected:
             await self.connection.close()
             self._is_connected = False
+            self._publish_exchanges = []
+            self._exchange_cycle = None
 
 
 rabbitmq_producer = RabbitMQProducer()
@@ -0,0 +1,115 @@
+import asyncio
+import datetime
+import logging
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Awaitable, Callable, Optional, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.db_settings import db_manager
+from src.crud.exchange_rates import ExchangeRatesCRUD
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class StoredRate:
+    rate: Decimal
+    fetched_at: datetime.datetime
+
+    def age_seconds(self) -> float:
+        return (utcnow() - self.fetched_at).total_seconds()
+
+
+class RateStore(Protocol):
+    async def load(self, currency_code: str) -> Optional[StoredRate]: ...
+
+    async def refresh(
+        self,
+        currency_code: str,
+        max_age_seconds: float,
+        fetch: Callable[[], Awaitable[Decimal]],
+    ) -> Optional[StoredRate]:
+        """Возвращает свежий курс, при необходимости запрашивая его через fetch."""
+        ...
+
+
+class PostgresRateStore:
+    """Общее хранилище курсов в таблице exchange_rates.
+
+    Запрос к источнику выполняет только процесс, взявший аренду в
+    exchange_rate_leases; остальные читают то, что уже записано в таблицу.
+    Аренда фиксируется короткой транзакцией, поэтому во время HTTP-запроса
+    соединение из пула не занято. Если процесс упал, не сняв аренду, она
+    истекает через lease_seconds.
+    """
+
+    def __init__(self, lease_seconds: float = 60.0):
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    async def _get(session: AsyncSession, currency_code: str) -> Optional[StoredRate]:
+        row = await ExchangeRatesCRUD.get(session, currency_code)
+        if row is None:
+            return None
+        return StoredRate(rate=row.rate, fetched_at=row.fetched_at)
+
+    async def load(self, currency_code: str) -> Optional[StoredRate]:
+        async with db_manager.session_factory() as session:
+            return await self._get(session, currency_code)
+
+    async def _release(self, currency_code: str) -> None:
+        async with db_manager.session_factory() as session:
+            await ExchangeRatesCRUD.release_lease(session, currency_code)
+            await session.commit()
+
+    async def refresh(
+        self,
+        currency_code: str,
+        max_age_seconds: float,
+        fetch: Callable[[], Awaitable[Decimal]],
+    ) -> Optional[StoredRate]:
+        async with db_manager.session_factory() as session:
+            stored = await self._get(session, currency_code)
+            if stored is not None and stored.age_seconds() < max_age_seconds:
+                return stored
+
+            if not await ExchangeRatesCRUD.try_acquire_lease(
+                session, currency_code, self.lease_seconds
+            ):
+                logger.info(
+                    "%s rate is being refreshed by another process", currency_code
+                )
+                return stored
+
+            # Между чтением и арендой курс мог обновить другой процесс
+            session.expire_all()
+            stored = await self._get(session, currency_code)
+            if stored is not None and stored.age_seconds() < max_age_seconds:
+                await ExchangeRatesCRUD.release_lease(session, currency_code)
+                await session.commit()
+                return stored
+            await session.commit()
+
+        try:
+            fresh = StoredRate(rate=await fetch(), fetched_at=utcnow())
+        except BaseException:
+            # Снимаем аренду, чтобы следующая попытка не ждала её истечения
+            try:
+                await asyncio.shield(self._release(currency_code))
+            except Exception as e:
+                logger.error(f"Failed to release {currency_code} rate lease: {e}")
+            raise
+
+        async with db_manager.session_factory() as session:
+            await ExchangeRatesCRUD.upsert(
+                session, currency_code, fresh.rate, fresh.fetched_at
+            )
+            await ExchangeRatesCRUD.release_lease(session, currency_code)
+            await session.commit()
+        return fresh
@@ -0,0 +1,325 @@
+"""Повторная отправка сообщений из failed_packages.
+
+    python -m src.workers.dlq_replay --rate 500 --max-retry-count 3 \\
+        --created-after 2026-10-01T00:00:00
+
+Очередь разбирается пачками. Подходящие под фильтр сообщения публикуются
+в packages_exchange со сброшенным retry_count, остальные перекладываются
+в конец failed_packages без изменения свойств. Обрабатывается не больше
+сообщений, чем было в очереди на момент запуска, поэтому переложенные
+сообщения повторно не читаются.
+
+С --dry-run фильтр применяется так же, но сообщения не публикуются и не
+подтверждаются: брокер вернёт их в очередь при закрытии соединения. Так как
+неподтверждённые сообщения занимают окно prefetch, в dry-run оно
+расширяется на пачку после каждой пачки, и за запуск можно просмотреть не
+больше MAX_PREFETCH сообщений.
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import aio_pika
+import aiormq
+
+from src.core.mq_settings import mq_settings
+
+logger = logging.getLogger(__name__)
+
+DLQ_NAME = "failed_packages"
+# prefetch_count в AMQP 0-9-1 — 16-битное число
+MAX_PREFETCH = 65535
+# Служебные заголовки dead-lettering, которые не переносятся в новое сообщение
+DEATH_HEADERS = (
+    "x-death",
+    "x-first-death-exchange",
+    "x-first-death-queue",
+    "x-first-death-reason",
+    "x-last-death-exchange",
+    "x-last-death-queue",
+    "x-last-death-reason",
+)
+
+
+@dataclass(frozen=True)
+class ReplayFilter:
+    min_retry_count: Optional[int] = None
+    max_retry_count: Optional[int] = None
+    created_after: Optional[datetime.datetime] = None
+    created_before: Optional[datetime.datetime] = None
+
+    def matches(self, headers: dict[str, Any]) -> bool:
+        retry_count = int(headers.get("retry_count", 0))
+        if self.min_retry_count is not None and retry_count < self.min_retry_count:
+            return False
+        if self.max_retry_count is not None and retry_count > self.max_retry_count:
+            return False
+
+        if self.created_after is None and self.created_before is None:
+            return True
+        created_at = headers.get("created_at")
+        if not isinstance(created_at, datetime.datetime):
+            return False
+        created_at = created_at.replace(tzinfo=None)
+        if self.created_after is not None and created_at < self.created_after:
+            return False
+        if self.created_before is not None and created_at >= self.created_before:
+            return False
+        return True
+
+
+@dataclass
+class ReplayStats:
+    seen: int = 0
+    replayed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    reasons: Counter = field(default_factory=Counter)
+    started: float = field(default_factory=time.monotonic)
+    dry_run: bool = False
+
+    def throughput(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return self.seen / elapsed if elapsed > 0 else 0.0
+
+    def counts(self) -> str:
+        if self.dry_run:
+            return f"would_replay={self.replayed} filtered={self.skipped}"
+        return f"replayed={self.replayed} skipped={self.skipped} failed={self.failed}"
+
+    def report(self) -> str:
+        lines = [
+            f"seen={self.seen} {self.counts()} "
+            f"elapsed={time.monotonic() - self.started:.1f}s "
+            f"throughput={self.throughput():.0f} msg/s",
+            "failure reasons:",
+        ]
+        lines.extend(
+            f"  {reason}: {count}" for reason, count in self.reasons.most_common()
+        )
+        return "\n".join(lines)
+
+
+def death_reason(headers: dict[str, Any]) -> str:
+    """Причина последнего dead-lettering в виде "<очередь>:<причина>"."""
+    deaths = headers.get("x-death")
+    if isinstance(deaths, list) and deaths and isinstance(deaths[0], dict):
+        return f"{deaths[0].get('queue', '?')}:{deaths[0].get('reason', '?')}"
+    return "unknown"
+
+
+class DLQReplayer:
+    def __init__(
+        self,
+        *,
+        replay_filter: ReplayFilter,
+        rate: float,
+        batch_size: int,
+        batch_window_seconds: float = 1.0,
+        limit: Optional[int] = None,
+        dry_run: bool = False,
+    ):
+        self.replay_filter = replay_filter
+        self.rate = rate
+        self.batch_size = batch_size
+        self.batch_window_seconds = batch_window_seconds
+        self.limit = limit
+        self.dry_run = dry_run
+        self.stats = ReplayStats(dry_run=dry_run)
+
+        self._incoming: asyncio.Queue[aio_pika.IncomingMessage] = asyncio.Queue()
+        self._exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self._default_exchange: Optional[aio_pika.abc.AbstractExchange] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+
+    @staticmethod
+    def _copy(
+        message: aio_pika.IncomingMessage,
+        headers: dict[str, Any],
+        expiration: Optional[int],
+    ) -> aio_pika.Message:
+        return aio_pika.Message(
+            body=message.body,
+            headers=headers,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+            priority=message.priority,
+            correlation_id=message.correlation_id,
+            message_id=message.message_id,
+            timestamp=message.timestamp,
+            type=message.type,
+            app_id=message.app_id,
+            expiration=expiration,
+        )
+
+    async def _handle(self, message: aio_pika.IncomingMessage) -> None:
+        headers = dict(message.headers or {})
+        self.stats.reasons[death_reason(headers)] += 1
+
+        replay = self.replay_filter.matches(headers)
+        if self.dry_run:
+            # Без ack сообщение вернётся в очередь при закрытии соединения
+            if replay:
+                self.stats.replayed += 1
+            else:
+                self.stats.skipped += 1
+            return
+
+        if replay:
+            for name in DEATH_HEADERS:
+                headers.pop(name, None)
+            headers["retry_count"] = 0
+            exchange, routing_key = self._exchange, "package.process"
+            copy = self._copy(message, headers, 3600000)  # 1 hour, как при публикации
+        else:
+            # Не подходит под фильтр: в конец очереди без изменений. У
+            # failed_packages нет DLX, поэтому TTL здесь означал бы потерю
+            exchange, routing_key = self._default_exchange, DLQ_NAME
+            copy = self._copy(message, headers, None)
+
+        try:
+            confirmation = await exchange.publish(  # type: ignore[union-attr]
+                copy, routing_key=routing_key
+            )
+            if not isinstance(confirmation, aiormq.spec.Basic.Ack):
+                raise RuntimeError("publish was not confirmed by broker")
+        except Exception as e:
+            logger.error(f"Failed to republish message {message.message_id}: {e}")
+            self.stats.failed += 1
+            await message.nack(requeue=True)
+            return
+
+        await message.ack()
+        if replay:
+            self.stats.replayed += 1
+        else:
+            self.stats.skipped += 1
+
+    async def _collect_batch(self, remaining: int) -> list[aio_pika.IncomingMessage]:
+        loop = asyncio.get_running_loop()
+        size = min(self.batch_size, remaining)
+        deadline = loop.time() + self.batch_window_seconds
+        batch: list[aio_pika.IncomingMessage] = []
+        while len(batch) < size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._incoming.get(), timeout=timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self) -> ReplayStats:
+        connection = await aio_pika.connect_robust(mq_settings.get_mq_url())
+        try:
+            channel = self._channel = await connection.channel(publisher_confirms=True)
+            await channel.set_qos(prefetch_count=min(self.batch_size, MAX_PREFETCH))
+            self._exchange = await channel.get_exchange("packages_exchange")
+            self._default_exchange = channel.default_exchange
+
+            queue = await channel.declare_queue(name=DLQ_NAME, durable=True)
+            total = queue.declaration_result.message_count or 0
+            if self.limit is not None:
+                total = min(total, self.limit)
+            if self.dry_run and total > MAX_PREFETCH:
+                logger.warning(
+                    f"Dry run inspects only the first {MAX_PREFETCH} of {total} messages"
+                )
+                total = MAX_PREFETCH
+            logger.info(f"{DLQ_NAME}: {total} messages to process")
+
+            consumer_tag = await queue.consume(self._incoming.put, no_ack=False)
+            try:
+                await self._drain(total)
+            finally:
+                await queue.cancel(consumer_tag)
+        finally:
+            await connection.close()
+        return self.stats
+
+    async def _drain(self, total: int) -> None:
+        next_at = time.monotonic()
+        while self.stats.seen < total:
+            batch = await self._collect_batch(total - self.stats.seen)
+            if not batch:
+                logger.info(f"{DLQ_NAME} is empty")
+                break
+
+            # Равномерный темп: пачка из n сообщений занимает не меньше n / rate
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_at = max(next_at, time.monotonic()) + len(batch) / self.rate
+
+            self.stats.seen += len(batch)
+            await asyncio.gather(*(self._handle(message) for message in batch))
+            if self.dry_run and self.stats.seen < total:
+                # Неподтверждённые сообщения занимают окно: следующая пачка
+                # доставляется, только если расширить его
+                await self._channel.set_qos(  # type: ignore[union-attr]
+                    prefetch_count=min(self.stats.seen + self.batch_size, MAX_PREFETCH)
+                )
+            logger.info(
+                f"Processed {self.stats.seen}/{total}: {self.stats.counts()} "
+                f"({self.stats.throughput():.0f} msg/s)"
+            )
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.workers.dlq_replay",
+        description="Replay dead-lettered package messages from failed_packages",
+    )
+    parser.add_argument("--rate", type=float, default=200.0, help="messages/s")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, help="process at most N messages")
+    parser.add_argument("--min-retry-count", type=int)
+    parser.add_argument("--max-retry-count", type=int)
+    parser.add_argument(
+        "--created-after", type=datetime.datetime.fromisoformat, help="ISO datetime"
+    )
+    parser.add_argument(
+        "--created-before", type=datetime.datetime.fromisoformat, help="ISO datetime"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="apply the filter and count messages without acking or republishing",
+    )
+    args = parser.parse_args(argv)
+    if args.rate <= 0 or args.batch_size <= 0:
+        parser.error("--rate and --batch-size must be positive")
+    return args
+
+
+async def main(argv: Optional[list[str]] = None) -> None:
+    args = parse_args(argv)
+    replayer = DLQReplayer(
+        replay_filter=ReplayFilter(
+            min_retry_count=args.min_retry_count,
+            max_retry_count=args.max_retry_count,
+            created_after=args.created_after,
+            created_before=args.created_before,
+        ),
+        rate=args.rate,
+        batch_size=args.batch_size,
+        limit=args.limit,
+        dry_run=args.dry_run,
+    )
+    stats = await replayer.run()
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -3,25 +3,59 @@ import asyncio
 import logging
 import aio_pika
 import json
+import signal
+import time
+from collections import OrderedDict
 from typing import Any, Dict, Optional
 from uuid import UUID
 
+from src.core.db_settings import db_manager
+from src.core.metrics import Counter, Histogram, start_metrics_server
 from src.core.mq_settings import mq_settings
+from src.core.worker_settings import WorkerSettings, worker_settings
+from src.services import pricing
 from src.services.currency import currency_service
 from src.services.package_worker import package_worker_service
+from src.services.rabbitmq_producer import declare_retry_queues
 
 logger = logging.getLogger(__name__)
 
+processing_duration = Histogram(
+    "worker_message_processing_seconds",
+    "Message processing time; in batch mode the time of the whole batch",
+    labelnames=("mode",),
+)
+messages_handled = Counter(
+    "worker_messages",
+    "Consumed messages by outcome",
+    labelnames=("result",),
+)
+retries_scheduled = Counter(
+    "worker_retries",
+    "Retries scheduled by attempt number",
+    labelnames=("attempt",),
+)
+_processed = messages_handled.labels("processed")
+_retried = messages_handled.labels("retried")
+_dead_lettered = messages_handled.labels("dead_lettered")
+_duplicates = messages_handled.labels("duplicate")
+_malformed = messages_handled.labels("malformed")
+
 
 class PackageConsumer:
-    def __init__(self):
+    def __init__(self, settings: WorkerSettings = worker_settings):
         self.connection: Optional[aio_pika.Connection] = None
         self.channel: Optional[aio_pika.Channel] = None
         self.queue: Optional[aio_pika.Queue] = None
         self._consuming = False
 
-        self.max_retries = 3
-        self.retry_delay = 5
+        self.settings = settings
+        self.max_retries = settings.MAX_RETRIES
+
+        self._batch_queue: asyncio.Queue[aio_pika.IncomingMessage] = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(settings.CONCURRENCY)
+        # LRU идентификаторов посылок, стоимость которых уже записана
+        self._completed: OrderedDict[str, None] = OrderedDict()
 
     async def __aenter__(self):
         await self.connect()
@@ -36,7 +70,9 @@ class PackageConsumer:
                 mq_settings.get_mq_url(),
             )
             self.channel = await self.connection.channel()
-            await self.channel.set_qos(prefetch_count=1)
+            await self.channel.set_qos(
+                prefetch_count=self.settings.get_prefetch_count()
+            )
             self.queue = await self.channel.declare_queue(
                 name="package_processing",
                 durable=True,
@@ -46,38 +82,29 @@ class PackageConsumer:
                     "x-dead-letter-routing-key": "failed_packages",
                 },
             )
+            await declare_retry_queues(self.channel)
         except Exception as e:
             logger.error(f"Error connecting to RabbitMQ: {e}")
             raise
 
-    def calculate_delivery_cost(
-        self, weight: float, value_of_contents_usd: Decimal, usd_rate: Decimal
-    ) -> Decimal:
-        base_cost_usd = Decimal(weight * 0.5) + Decimal(
-            value_of_contents_usd
-        ) * Decimal(0.01)
-        delivery_cost_rub: Decimal = Decimal(base_cost_usd * usd_rate)
-
-        return delivery_cost_rub
-
     async def process_package_message(self, message_data: Dict[str, Any]) -> bool:
         package_id = UUID(message_data["id"])
 
         try:
             usd_rate = await currency_service.get_usd_rate()
 
-            delivery_cost = self.calculate_delivery_cost(
+            delivery_cost = pricing.calculate_delivery_cost(
                 weight=float(message_data["weight"]),
                 value_of_contents_usd=Decimal(
                     str(message_data["value_of_contents_usd"])
                 ),
                 usd_rate=usd_rate,
             )
-            updated_package = await package_worker_service.update_package_delivery_cost(
+            priced = await package_worker_service.update_package_delivery_cost(
                 package_id, delivery_cost
             )
 
-            if updated_package:
+            if priced:
                 logger.info(
                     "Successfully updated delivery cost for package %s", package_id
                 )
@@ -93,28 +120,282 @@ class PackageConsumer:
             logger.error("Failed to process package %s: %s", package_id, e)
             return False
 
+    @staticmethod
+    def _parse_message(message: aio_pika.IncomingMessage) -> Dict[str, Any]:
+        """Тело сообщения с проверенным id посылки; ValueError для битых."""
+        message_data = json.loads(message.body.decode("utf-8"))
+        if not isinstance(message_data, dict) or not isinstance(
+            message_data.get("id"), str
+        ):
+            raise ValueError("package id is missing or not a string")
+        UUID(message_data["id"])
+        return message_data
+
+    def _is_duplicate(self, message: aio_pika.IncomingMessage) -> bool:
+        """Повторная доставка уже обработанной посылки (message_id = id посылки)."""
+        package_id = message.message_id
+        if package_id is None or package_id not in self._completed:
+            return False
+        self._completed.move_to_end(package_id)
+        _duplicates.inc()
+        logger.info(f"Package {package_id} already processed, skipping duplicate")
+        return True
+
+    def _mark_completed(self, package_id: str) -> None:
+        if self.settings.DEDUP_CACHE_SIZE == 0:
+            return
+        self._completed[package_id] = None
+        self._completed.move_to_end(package_id)
+        while len(self._completed) > self.settings.DEDUP_CACHE_SIZE:
+            self._completed.popitem(last=False)
+
+    @staticmethod
+    def _get_retry_count(message: aio_pika.IncomingMessage) -> int:
+        if message.headers:
+            return int(message.headers.get("retry_count", 0))  # type: ignore
+        return 0
+
+    async def _publish_retry(
+        self, message: aio_pika.IncomingMessage, package_id: str, retry_count: int
+    ) -> None:
+        """Отправляет сообщение в TTL-очередь ступени, соответствующей попытке.
+
+        По истечении задержки брокер сам вернёт его в package_processing,
+        поэтому consumer не ждёт и сразу освобождается для новых сообщений.
+        """
+        new_headers = dict(message.headers) if message.headers else {}
+        new_headers["retry_count"] = retry_count + 1
+
+        delay_ms = mq_settings.get_retry_delay_ms(retry_count)
+        await self.channel.default_exchange.publish(  # type: ignore
+            aio_pika.Message(
+                body=message.body,
+                headers=new_headers,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                priority=1,
+                message_id=package_id,
+                expiration=3600000,  # 1 hour
+            ),
+            routing_key=mq_settings.get_retry_queue_name(delay_ms),
+        )
+        retries_scheduled.labels(retry_count + 1).inc()
+        _retried.inc()
+
+    async def _retry(
+        self, message: aio_pika.IncomingMessage, package_id: str, retry_count: int
+    ) -> None:
+        try:
+            await self._publish_retry(message, package_id, retry_count)
+            await message.ack()
+        except Exception as e:
+            logger.error(f"Failed to schedule retry for package {package_id}: {e}")
+            _dead_lettered.inc()
+            await message.reject(requeue=False)
+
+    async def _collect_batch(self) -> list[aio_pika.IncomingMessage]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._batch_queue.get()]
+        deadline = loop.time() + self.settings.BATCH_WINDOW_SECONDS
+
+        while len(batch) < self.settings.BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._batch_queue.get(), timeout=timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def process_batch(self, messages: list[aio_pika.IncomingMessage]) -> None:
+        pending: list[tuple[aio_pika.IncomingMessage, Dict[str, Any], int]] = []
+
+        for message in messages:
+            if self._is_duplicate(message):
+                await message.ack()
+                continue
+
+            try:
+                message_data = self._parse_message(message)
+            except ValueError as e:
+                logger.error(f"Malformed message {message.message_id}: {e}")
+                _malformed.inc()
+                await message.reject(requeue=False)
+                continue
+
+            retry_count = self._get_retry_count(message)
+            if retry_count >= self.max_retries:
+                logger.error(
+                    f"Too much retries for package {message_data['id']}; Send to DLX"
+                )
+                _dead_lettered.inc()
+                await message.reject(requeue=False)
+                continue
+
+            pending.append((message, message_data, retry_count))
+
+        if not pending:
+            return
+
+        valid: list[tuple[aio_pika.IncomingMessage, Dict[str, Any], int]] = []
+        package_ids: list[UUID] = []
+        weights_mg: list[int] = []
+        values_cents: list[int] = []
+        for message, message_data, retry_count in pending:
+            try:
+                weight_mg = pricing.to_scaled(
+                    float(message_data["weight"]), pricing.WEIGHT_SCALE
+                )
+                value_cents = pricing.to_scaled(
+                    str(message_data["value_of_contents_usd"]), pricing.VALUE_SCALE
+                )
+            except (KeyError, TypeError, ArithmeticError, ValueError) as e:
+                # Данные не станут корректными при повторе: сразу в DLX
+                logger.error(
+                    "Invalid data in message for package %s: %s", message_data["id"], e
+                )
+                _malformed.inc()
+                await message.reject(requeue=False)
+                continue
+            valid.append((message, message_data, retry_count))
+            package_ids.append(UUID(message_data["id"]))
+            weights_mg.append(weight_mg)
+            values_cents.append(value_cents)
+
+        if not valid:
+            return
+
+        updated: set[UUID] = set()
+        started = time.perf_counter()
+        try:
+            usd_rate = await currency_service.get_usd_rate()
+            kopecks = pricing.calculate_delivery_costs_kopecks(
+                weights_mg,
+                values_cents,
+                pricing.to_scaled(usd_rate, pricing.RATE_SCALE),
+            )
+            updated = await package_worker_service.update_delivery_costs_bulk(
+                {pid: pricing.from_kopecks(k) for pid, k in zip(package_ids, kopecks)}
+            )
+        except Exception as e:
+            logger.error("Failed to process batch of %s packages: %s", len(valid), e)
+        processing_duration.labels("batch").observe(time.perf_counter() - started)
+
+        for message, message_data, retry_count in valid:
+            package_id = message_data["id"]
+            if UUID(package_id) in updated:
+                self._mark_completed(package_id)
+                _processed.inc()
+                await message.ack()
+                continue
+
+            logger.warning(
+                f"Error while processing package {package_id},"
+                f"retry {retry_count + 1}/{self.max_retries}"
+            )
+            await self._retry(message, package_id, retry_count)
+
+    async def _consume_batches(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self.process_batch(batch)
+            except Exception as e:
+                logger.critical(f"Critical batch processing error: {e}")
+                await self._reject_unsettled(batch)
+
+    async def _reject_unsettled(self, batch: list[aio_pika.IncomingMessage]) -> None:
+        """Отправляет в DLX сообщения пачки, оставшиеся без ack/reject.
+
+        Иначе они держали бы слоты prefetch до разрыва соединения, а после
+        переподключения пришли бы снова. При отмене задачи (остановка
+        worker) сообщения не трогаем: брокер вернёт их в очередь сам.
+        """
+        for message in batch:
+            if message.processed:
+                continue
+            _dead_lettered.inc()
+            try:
+                await message.reject(requeue=False)
+            except Exception as e:
+                logger.error(f"Failed to reject message {message.message_id}: {e}")
+
+    async def handle_message_concurrently(self, message: aio_pika.IncomingMessage):
+        if self._is_duplicate(message):
+            await message.ack()
+            return
+
+        async with self._semaphore:
+            try:
+                message_data = self._parse_message(message)
+                package_id = message_data["id"]
+            except ValueError as e:
+                logger.error(f"Malformed message {message.message_id}: {e}")
+                _malformed.inc()
+                await message.reject(requeue=False)
+                return
+
+            logger.info(f"Message received for package {package_id}")
+
+            retry_count = self._get_retry_count(message)
+            if retry_count >= self.max_retries:
+                logger.error(f"Too much retries for package {package_id}; Send to DLX")
+                _dead_lettered.inc()
+                await message.reject(requeue=False)
+                return
+
+            started = time.perf_counter()
+            success = await self.process_package_message(message_data=message_data)
+            processing_duration.labels("concurrent").observe(
+                time.perf_counter() - started
+            )
+
+        if success:
+            logger.info(f"Message for package {package_id} processed")
+            self._mark_completed(package_id)
+            _processed.inc()
+            await message.ack()
+            return
+
+        logger.warning(
+            f"Error while processing package {package_id},"
+            f"retry {retry_count + 1}/{self.max_retries}"
+        )
+        await self._retry(message, package_id, retry_count)
+
     async def handle_message(self, message: aio_pika.IncomingMessage):
         async with message.process(requeue=False):
+            if self._is_duplicate(message):
+                return True
+
             try:
-                message_data = json.loads(message.body.decode("utf-8"))
+                message_data = self._parse_message(message)
                 package_id = message_data["id"]
 
                 logger.info(f"Message received for package {package_id}")
 
-                retry_count = 0
-                if message.headers:
-                    retry_count = message.headers.get("retry_count", 0)  # type: ignore
+                retry_count = self._get_retry_count(message)
 
                 if retry_count >= self.max_retries:
                     logger.error(
                         f"Too much retries for package {package_id}; Send to DLX"
                     )
+                    _dead_lettered.inc()
                     return False
 
+                started = time.perf_counter()
                 success = await self.process_package_message(message_data=message_data)
+                processing_duration.labels("single").observe(
+                    time.perf_counter() - started
+                )
 
                 if success:
                     logger.info(f"Message for package {package_id} processed")
+                    self._mark_completed(package_id)
+                    _processed.inc()
                     return True
                 else:
                     logger.warning(
@@ -122,26 +403,12 @@ class PackageConsumer:
                         f"retry {retry_count + 1}/{self.max_retries}"
                     )
 
-                    new_headers = dict(message.headers) if message.headers else {}
-                    new_headers["retry_count"] = retry_count + 1
-
-                    await asyncio.sleep(self.retry_delay * (retry_count + 1))
-
-                    await self.channel.default_exchange.publish(  # type: ignore
-                        aio_pika.Message(
-                            body=message.body,
-                            headers=new_headers,
-                            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-                            priority=1,
-                            message_id=package_id,
-                            expiration=3600000,  # 1 hour
-                        ),
-                        routing_key=self.queue.name,  # type: ignore
-                    )
+                    await self._publish_retry(message, package_id, retry_count)
 
                     return True
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error: {e}")
+            except ValueError as e:
+                logger.error(f"Malformed message {message.message_id}: {e}")
+                _malformed.inc()
                 return False
             except Exception as e:
                 logger.critical(f"Unexpected error while processing message: {e}")
@@ -159,7 +426,27 @@ class PackageConsumer:
             except Exception as e:
                 logger.critical(f"Critical processing error: {e}")
 
-        consumer_tag = await self.queue.consume(callback=message_handler, no_ack=False)
+        async def batch_message_handler(message: aio_pika.IncomingMessage):
+            await self._batch_queue.put(message)
+
+        async def concurrent_message_handler(message: aio_pika.IncomingMessage):
+            try:
+                await self.handle_message_concurrently(message=message)
+            except Exception as e:
+                logger.critical(f"Critical processing error: {e}")
+                # Иначе сообщение держит слот prefetch до разрыва соединения
+                if not message.processed:
+                    await message.reject(requeue=False)
+
+        callback = message_handler
+        batch_task: Optional[asyncio.Task] = None
+        if self.settings.MODE == "batch":
+            callback = batch_message_handler
+            batch_task = asyncio.create_task(self._consume_batches())
+        elif self.settings.MODE == "concurrent":
+            callback = concurrent_message_handler
+
+        consumer_tag = await self.queue.consume(callback=callback, no_ack=False)
 
         self._consuming = True
 
@@ -170,6 +457,8 @@ class PackageConsumer:
             logger.info(ki)
         finally:
             await self.queue.cancel(consumer_tag)
+            if batch_task is not None:
+                batch_task.cancel()
             await self.close()
 
     async def stop_consuming(self):
@@ -180,16 +469,39 @@ class PackageConsumer:
             await self.connection.close()
 
 
-async def main():
+async def main(metrics_port: Optional[int] = worker_settings.METRICS_PORT):
+    db_manager.use_default_profile("worker")
     consumer = PackageConsumer()
 
+    metrics_server = None
+    if metrics_port is not None:
+        try:
+            metrics_server = await start_metrics_server(metrics_port)
+        except OSError as e:
+            logger.error(f"Failed to start metrics server on port {metrics_port}: {e}")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(
+            sig, lambda: asyncio.ensure_future(consumer.stop_consuming())
+        )
+
+    await currency_service.start()
     try:
         await consumer.start_consuming()
     except Exception as e:
         logger.critical(f"Critical worker error: {e}")
     finally:
         await consumer.close()
+        await currency_service.close()
+        if metrics_server is not None:
+            metrics_server.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if worker_settings.PROCESSES > 1:
+        from src.workers.supervisor import WorkerSupervisor
+
+        WorkerSupervisor().run()
+    else:
+        asyncio.run(main())
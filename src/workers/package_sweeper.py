@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import signal
+from datetime import timedelta
+
+from src.core.db_settings import db_manager
+from src.core.worker_settings import WorkerSettings, worker_settings
+from src.services.currency import currency_service
+from src.services.package_worker import package_worker_service
+
+logger = logging.getLogger(__name__)
+
+
+class PackageSweeper:
+    """Периодически досчитывает посылки, оставшиеся без стоимости доставки.
+
+    Такое бывает, если сообщение истекло в очереди, ушло в failed_packages
+    или не было опубликовано. Строки блокируются через SKIP LOCKED, поэтому
+    sweeper можно запускать рядом с обычным consumer.
+    """
+
+    def __init__(self, settings: WorkerSettings = worker_settings):
+        self.settings = settings
+        self._stopping = asyncio.Event()
+
+    async def sweep(self) -> int:
+        """Один проход по всем старым посылкам без стоимости."""
+        usd_rate = await currency_service.get_usd_rate()
+        min_age = timedelta(seconds=self.settings.SWEEP_MIN_AGE_SECONDS)
+        after = None
+        repriced = 0
+
+        while not self._stopping.is_set():
+            claimed, updated, after = (
+                await package_worker_service.reprice_unpriced_batch(
+                    usd_rate=usd_rate,
+                    min_age=min_age,
+                    after=after,
+                    limit=self.settings.SWEEP_BATCH_SIZE,
+                )
+            )
+            repriced += updated
+            if claimed < self.settings.SWEEP_BATCH_SIZE:
+                break
+
+        return repriced
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                repriced = await self.sweep()
+                if repriced:
+                    logger.warning(f"Sweeper repriced {repriced} stale packages")
+                else:
+                    logger.info("Sweeper found no stale packages")
+            except Exception as e:
+                logger.error(f"Sweep failed: {e}")
+
+            try:
+                await asyncio.wait_for(
+                    self._stopping.wait(),
+                    timeout=self.settings.SWEEP_INTERVAL_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+async def main():
+    db_manager.use_default_profile("worker")
+    sweeper = PackageSweeper()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, sweeper.stop)
+
+    await currency_service.start()
+    try:
+        await sweeper.run()
+    finally:
+        await currency_service.close()
+        await db_manager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
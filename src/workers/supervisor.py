@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.process import BaseProcess
+from typing import Optional
+
+from src.core.worker_settings import WorkerSettings, worker_settings
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker_process(index: int, pool_size: int) -> None:
+    """Точка входа дочернего процесса: собственный пул БД и соединение с MQ."""
+    from src.core.db_settings import db_manager
+    from src.workers.package_consumer import main
+
+    db_manager.configure_pool(pool_size=pool_size, max_overflow=0)
+    logger.info("Worker process %s started with pool_size=%s", index, pool_size)
+    metrics_port = worker_settings.METRICS_PORT
+    asyncio.run(main(None if metrics_port is None else metrics_port + index))
+
+
+class WorkerSupervisor:
+    def __init__(self, settings: WorkerSettings = worker_settings):
+        self.settings = settings
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: list[Optional[BaseProcess]] = [None] * settings.PROCESSES
+        self._started_at = [0.0] * settings.PROCESSES
+        self._restart_at = [0.0] * settings.PROCESSES
+        self._restart_delay = [settings.RESTART_DELAY_SECONDS] * settings.PROCESSES
+        self._stopping = False
+
+    def _start_process(self, index: int) -> None:
+        process = self._context.Process(
+            target=run_worker_process,
+            args=(index, self.settings.get_pool_size_per_process()),
+            name=f"packages-worker-{index}",
+        )
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = time.monotonic()
+        logger.info("Started worker process %s (pid %s)", index, process.pid)
+
+    def _request_stop(self, signum, frame) -> None:
+        logger.info("Received signal %s, stopping worker processes", signum)
+        self._stopping = True
+
+    def _schedule_restart(self, index: int, process: BaseProcess) -> None:
+        now = time.monotonic()
+        uptime = now - self._started_at[index]
+        if uptime >= self.settings.RESTART_RESET_AFTER_SECONDS:
+            self._restart_delay[index] = self.settings.RESTART_DELAY_SECONDS
+        delay = self._restart_delay[index]
+        logger.error(
+            "Worker process %s (pid %s) exited with code %s after %.1fs, "
+            "restarting in %.1fs",
+            index,
+            process.pid,
+            process.exitcode,
+            uptime,
+            delay,
+        )
+        self._processes[index] = None
+        self._restart_at[index] = now + delay
+        # Процесс, падающий сразу после старта, перезапускается всё реже
+        self._restart_delay[index] = min(
+            max(delay * 2, self.settings.RESTART_DELAY_SECONDS, 1.0),
+            self.settings.RESTART_MAX_DELAY_SECONDS,
+        )
+
+    def _shutdown(self) -> None:
+        alive = [p for p in self._processes if p is not None and p.is_alive()]
+        for process in alive:
+            process.terminate()
+
+        deadline = time.monotonic() + self.settings.SHUTDOWN_TIMEOUT_SECONDS
+        for process in alive:
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker process %s did not stop, killing", process.pid)
+                process.kill()
+                process.join()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        for index in range(self.settings.PROCESSES):
+            self._start_process(index)
+
+        try:
+            while not self._stopping:
+                for index, process in enumerate(self._processes):
+                    if process is None:
+                        if time.monotonic() >= self._restart_at[index]:
+                            self._start_process(index)
+                    elif not process.is_alive():
+                        self._schedule_restart(index, process)
+                time.sleep(1)
+        finally:
+            self._shutdown()
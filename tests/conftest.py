@@ -0,0 +1,7 @@
+import os
+
+# Настройки БД читаются при импорте src.core.db_settings; тестам, которые не
+# подключаются к primary, достаточно любых значений
+os.environ.setdefault("POSTGRES_DB", "test")
+os.environ.setdefault("POSTGRES_USER", "test")
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
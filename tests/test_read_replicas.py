@@ -0,0 +1,169 @@
+"""Маршрутизация чтений по репликам; реплики заменены файлами SQLite."""
+
+import pytest
+from sqlalchemy import text
+
+from src.core.db_settings import DatabaseManager, DatabaseSettings
+from src.core.unit_of_work import UnitOfWork
+
+pytest.importorskip("aiosqlite")
+
+
+async def _create_database(tmp_path, name: str) -> str:
+    """База SQLite с таблицей whoami, в которой записано её имя."""
+    url = f"sqlite+aiosqlite:///{tmp_path / name}.db"
+    manager = DatabaseManager(_settings(REPLICA_URLS=[url]))
+    async with manager.read_session_factory()() as session:
+        await session.execute(text("CREATE TABLE whoami (name TEXT)"))
+        await session.execute(text("INSERT INTO whoami VALUES (:name)"), {"name": name})
+        await session.commit()
+    await manager.close()
+    return url
+
+
+@pytest.fixture
+async def replicas(tmp_path):
+    """Две реплики; в каждой таблица с именем самой реплики."""
+    return [
+        await _create_database(tmp_path, name) for name in ("replica_a", "replica_b")
+    ]
+
+
+@pytest.fixture
+async def primary(tmp_path, monkeypatch):
+    """Primary тоже заменён SQLite: подменяется DSN из настроек."""
+    url = await _create_database(tmp_path, "primary")
+    monkeypatch.setattr(DatabaseSettings, "get_database_url", lambda self: url)
+    return url
+
+
+def _settings(**kwargs) -> DatabaseSettings:
+    return DatabaseSettings(DB="test", USER="test", PASSWORD="test", **kwargs)
+
+
+async def _whoami(manager: DatabaseManager, key=None) -> str:
+    async with manager.read_session_factory(key)() as session:
+        return (await session.execute(text("SELECT name FROM whoami"))).scalar_one()
+
+
+async def test_without_replicas_reads_go_to_primary():
+    manager = DatabaseManager(_settings())
+
+    assert manager.read_session_factory() is manager.session_factory
+    assert manager.read_session_factory("session") is manager.session_factory
+
+
+async def test_reads_round_robin_over_replicas(replicas):
+    manager = DatabaseManager(_settings(REPLICA_URLS=replicas))
+    try:
+        names = [await _whoami(manager) for _ in range(4)]
+    finally:
+        await manager.close()
+
+    assert names == ["replica_a", "replica_b", "replica_a", "replica_b"]
+
+
+async def test_reads_after_write_go_to_primary_within_window(replicas, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.core.db_settings.time.monotonic", lambda: now[0])
+    manager = DatabaseManager(
+        _settings(REPLICA_URLS=replicas, READ_YOUR_WRITES_SECONDS=5.0)
+    )
+    try:
+        manager.mark_write("writer")
+
+        assert manager.read_session_factory("writer") is manager.session_factory
+        # Остальные сессии и анонимные чтения продолжают идти в реплики
+        assert await _whoami(manager, "reader") == "replica_a"
+        assert await _whoami(manager) == "replica_b"
+
+        now[0] += 4.9
+        assert manager.read_session_factory("writer") is manager.session_factory
+
+        now[0] += 0.2
+        assert await _whoami(manager, "writer") == "replica_a"
+    finally:
+        await manager.close()
+
+
+async def test_expired_writes_are_evicted(replicas, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.core.db_settings.time.monotonic", lambda: now[0])
+    manager = DatabaseManager(
+        _settings(REPLICA_URLS=replicas, READ_YOUR_WRITES_SECONDS=5.0)
+    )
+
+    manager.mark_write("first")
+    now[0] += 3.0
+    manager.mark_write("second")
+    now[0] += 3.0
+    manager.mark_write("third")
+
+    # Окно "first" истекло и запись удалена, "second" ещё действует
+    assert list(manager._recent_writes) == ["second", "third"]
+    assert manager.read_session_factory("first") is not manager.session_factory
+    assert manager.read_session_factory("second") is manager.session_factory
+
+
+async def test_mark_write_is_noop_without_replicas():
+    manager = DatabaseManager(_settings())
+
+    manager.mark_write("writer")
+
+    assert not manager._recent_writes
+
+
+async def _uow_whoami(manager: DatabaseManager, key=None) -> str:
+    uow = UnitOfWork(manager)
+    try:
+        session = await uow.read_session(key)
+        return (await session.execute(text("SELECT name FROM whoami"))).scalar_one()
+    finally:
+        await uow.release()
+
+
+async def test_unit_of_work_reads_from_replica(primary, replicas):
+    manager = DatabaseManager(_settings(REPLICA_URLS=replicas))
+    try:
+        assert await _uow_whoami(manager, "reader") == "replica_a"
+        assert await _uow_whoami(manager, "reader") == "replica_b"
+    finally:
+        await manager.close()
+
+
+async def test_unit_of_work_commit_routes_writer_reads_to_primary(
+    primary, replicas, monkeypatch
+):
+    now = [1000.0]
+    monkeypatch.setattr("src.core.db_settings.time.monotonic", lambda: now[0])
+    manager = DatabaseManager(
+        _settings(REPLICA_URLS=replicas, READ_YOUR_WRITES_SECONDS=5.0)
+    )
+    try:
+        uow = UnitOfWork(manager)
+        session = await uow.session()
+        await session.execute(text("UPDATE whoami SET name = 'primary'"))
+        await uow.commit(written_by="writer")
+
+        assert await _uow_whoami(manager, "writer") == "primary"
+        assert await _uow_whoami(manager, "reader") == "replica_a"
+
+        now[0] += 4.9
+        assert await _uow_whoami(manager, "writer") == "primary"
+
+        now[0] += 0.2
+        assert await _uow_whoami(manager, "writer") == "replica_b"
+    finally:
+        await manager.close()
+
+
+async def test_unit_of_work_commit_without_writer_keeps_replicas(primary, replicas):
+    manager = DatabaseManager(_settings(REPLICA_URLS=replicas))
+    try:
+        uow = UnitOfWork(manager)
+        await uow.session()
+        await uow.commit()
+
+        assert await _uow_whoami(manager, "writer") == "replica_a"
+    finally:
+        await manager.close()